@@ -445,6 +445,77 @@ const DiagnosticSystem = () => {
   // This state will hold the final report data to pass to the dashboard
   const [finalReport, setFinalReport] = useState<any | null>(null);
 
+  // --- Interview WebSocket: one connection per session, resumed after drops ---
+  const socketRef = useRef<WebSocket | null>(null);
+  const conversationIdRef = useRef<string | null>(null);
+  const pendingIndexRef = useRef<number | null>(null);
+  const interviewDoneRef = useRef(false);
+  const startMessageRef = useRef<object | null>(null);
+
+  const handleSocketMessage = (event: MessageEvent) => {
+    const message = JSON.parse(event.data);
+    switch (message.type) {
+      case "ping":
+        socketRef.current?.send(JSON.stringify({ type: "pong" }));
+        break;
+      case "accepted":
+        // The graph run survives a dropped socket; this id lets us resume it.
+        conversationIdRef.current = message.conversation_id;
+        break;
+      case "session":
+        conversationIdRef.current = message.conversation_id;
+        setConversationId(message.conversation_id);
+        break;
+      case "question":
+        // A resumed socket re-sends the pending question; only show it once.
+        if (pendingIndexRef.current !== message.index) {
+          pendingIndexRef.current = message.index;
+          setMessages(prev => [...prev, { sender: "ai", text: message.question }]);
+        }
+        setIsChatOpen(true);
+        setIsLoading(false);
+        break;
+      case "done":
+        interviewDoneRef.current = true;
+        setFinalReport(message.final_analysis);
+        setActiveTab("results");
+        setIsChatOpen(false);
+        setIsLoading(false);
+        socketRef.current?.close();
+        break;
+      case "busy":
+        // Shed under load: the accepted run is gone, retry the start after the server's hint.
+        conversationIdRef.current = null;
+        setTimeout(() => socketRef.current?.send(JSON.stringify(startMessageRef.current)), message.retry_after * 1000);
+        break;
+      case "error":
+        console.error("Interview error:", message.detail);
+        setIsLoading(false);
+        break;
+    }
+  };
+
+  const openInterviewSocket = (firstMessage: object) => {
+    const socket = new WebSocket("ws://127.0.0.1:8000/diagnose/ws");
+    socketRef.current = socket;
+    socket.onopen = () => socket.send(JSON.stringify(firstMessage));
+    socket.onmessage = handleSocketMessage;
+    socket.onerror = () => console.error("Interview socket error");
+    socket.onclose = () => {
+      if (interviewDoneRef.current || socketRef.current !== socket) return;
+      if (conversationIdRef.current) {
+        // Reconnect and resume the run or interview.
+        setTimeout(() => openInterviewSocket({ type: "resume", conversation_id: conversationIdRef.current }), 1000);
+      } else if (startMessageRef.current) {
+        // The socket never got a run started (e.g. WebSockets are blocked): use the HTTP endpoint.
+        const { patient_data } = startMessageRef.current as { patient_data: object };
+        startMessageRef.current = null;
+        socketRef.current = null;
+        startConversationOverHttp({ patient_data });
+      }
+    };
+  };
+
 
   // --- Function to START the conversation ---
     // 2. Use FormData to handle both JSON and file uploads
@@ -470,6 +541,22 @@ const handleStartConversation = async () => {
     },
   };
 
+  if ("WebSocket" in window) {
+    interviewDoneRef.current = false;
+    conversationIdRef.current = null;
+    pendingIndexRef.current = null;
+    setMessages([]);
+    startMessageRef.current = { type: "start", patient_data: jsonData.patient_data };
+    openInterviewSocket(startMessageRef.current);
+    return;
+  }
+
+  await startConversationOverHttp(jsonData);
+};
+
+const startConversationOverHttp = async (jsonData: object) => {
+  setIsLoading(true);
+  let retrying = false;
   try {
     const response = await fetch("http://127.0.0.1:8000/diagnose/start", {
       method: "POST",
@@ -478,6 +565,14 @@ const handleStartConversation = async () => {
     });
 
     const result = await response.json();
+    if (response.status === 429) {
+      // Shed under load: wait out the server's hint (header, or the body when the header is not exposed).
+      const retryAfter = Number(response.headers.get("Retry-After") ?? result.detail?.retry_after) || 5;
+      setMessages([{ sender: "ai", text: `The service is busy. Retrying in ${retryAfter} seconds...` }]);
+      setTimeout(() => startConversationOverHttp(jsonData), retryAfter * 1000);
+      retrying = true;
+      return;
+    }
 
     setConversationId(result.conversation_id);
     if (result.pending_question) {
@@ -490,7 +585,7 @@ const handleStartConversation = async () => {
   } catch (err) {
     console.error("Start error:", err);
   } finally {
-    setIsLoading(false);
+    if (!retrying) setIsLoading(false);
   }
 };
 
@@ -500,6 +595,12 @@ const handleContinueConversation = async (answer: string) => {
   setMessages(prev => [...prev, { sender: "user", text: answer }]);
   setIsLoading(true);
 
+  const socket = socketRef.current;
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    socket.send(JSON.stringify({ type: "answer", answer, index: pendingIndexRef.current }));
+    return;
+  }
+
   try {
     const response = await fetch(`http://127.0.0.1:8000/diagnose/continue?conversation_id=${conversationId}`, {
       method: "POST",
@@ -0,0 +1,114 @@
+# benchmarks/bench_admission.py
+"""
+Latency of critical requests to /diagnose/start under saturation.
+
+Replays an open-loop Poisson arrival stream that offers more work than the
+server can do. Graph runs are simulated with asyncio.sleep. The mix is 10%
+critical, 30% urgent and 60% routine. Two setups are compared:
+
+  fifo       a plain semaphore of the same size: everything queues, nothing is shed
+  admission  the urgency-aware AdmissionController: per-class limits, priority
+             queue, and 429 + Retry-After for routine work it cannot serve in time
+
+Times are in units of the mean service time, so the result does not depend on --service-ms.
+
+Usage (from backend/):
+    python benchmarks/bench_admission.py --requests 3000 --overload 1.5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.admission import URGENCY_LEVELS, AdmissionController, AdmissionRejected  # noqa: E402
+
+MIX = {"critical": 0.1, "urgent": 0.3, "routine": 0.6}
+
+
+def make_workload(requests: int, rate: float, seed: int):
+    rng = random.Random(seed)
+    at, workload = 0.0, []
+    for _ in range(requests):
+        at += rng.expovariate(rate)
+        level = rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        workload.append((at, level))
+    return workload
+
+
+async def simulate(workload, service_time: float, concurrency: int, controller=None):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {level: [] for level in URGENCY_LEVELS}
+    rejected = {level: 0 for level in URGENCY_LEVELS}
+    rng = random.Random(1)
+    start = time.perf_counter()
+
+    async def request(at, level):
+        await asyncio.sleep(max(0.0, at - (time.perf_counter() - start)))
+        began = time.perf_counter()
+        work = rng.expovariate(1 / service_time)
+        try:
+            if controller is None:
+                async with semaphore:
+                    await asyncio.sleep(work)
+            else:
+                async with controller.admit(level):
+                    await asyncio.sleep(work)
+        except AdmissionRejected:
+            rejected[level] += 1
+            return
+        latencies[level].append((time.perf_counter() - began) / service_time)
+
+    await asyncio.gather(*(request(at, level) for at, level in workload))
+    return latencies, rejected
+
+
+def report(name, latencies, rejected):
+    print(f"\n{name}")
+    print(f"  {'class':<9} {'served':>7} {'shed':>6} {'p50':>8} {'p99':>8}   (latency in mean service times)")
+    for level in URGENCY_LEVELS:
+        values = sorted(latencies[level])
+        p50 = statistics.median(values) if values else float("nan")
+        p99 = values[int(len(values) * 0.99) - 1] if values else float("nan")
+        print(f"  {level:<9} {len(values):>7} {rejected[level]:>6} {p50:>8.2f} {p99:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--service-ms", type=float, default=20.0, help="mean simulated graph run")
+    parser.add_argument("--overload", type=float, default=1.5, help="offered load / capacity")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    service_time = args.service_ms / 1000
+    rate = args.overload * args.concurrency / service_time
+    workload = make_workload(args.requests, rate, args.seed)
+    print(f"{args.requests} requests at {args.overload:.1f}x capacity "
+          f"({args.concurrency} slots, {args.service_ms:.0f} ms mean service)")
+
+    report("fifo", *asyncio.run(simulate(workload, service_time, args.concurrency)))
+
+    # Same defaults as the production controller, with waits scaled to the simulated service time.
+    controller = AdmissionController(
+        max_concurrency=args.concurrency,
+        class_limits={"critical": args.concurrency,
+                      "urgent": max(1, args.concurrency * 3 // 4),
+                      "routine": max(1, args.concurrency // 2)},
+        queue_limits={"critical": 256, "urgent": 64, "routine": 16},
+        max_wait={"critical": 600 * service_time / 30, "urgent": 120 * service_time / 30,
+                  "routine": 30 * service_time / 30},
+    )
+    report("admission", *asyncio.run(simulate(workload, service_time, args.concurrency, controller)))
+    snapshot = controller.snapshot()
+    print(f"\n  controller retry-after estimate basis: {snapshot['service_time_ewma_s'] * 1000:.1f} ms service EWMA")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_case_index.py
+"""
+Builds a synthetic case index, reopens it memory-mapped and measures lookup latency,
+then keeps adding cases (as the specialist node does) while querying, to show that
+background flushes and segment merges do not stall add() or query().
+
+Usage (from backend/):
+    python benchmarks/bench_case_index.py --cases 1000000 --queries 2000 --adds 20000 --dir /tmp/case_index
+
+Back-to-back adds (thousands per second) make queries compete with the flush thread for
+the GIL; pass --add-interval 0.002 for a rate that is still far above real traffic.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.case_index import CaseIndex  # noqa: E402
+
+SYMPTOMS = ["fever", "rash", "pruritus", "cough", "fatigue", "headache", "nausea", "chest pain", "dyspnea",
+            "abdominal pain", "diarrhea", "myalgia", "sore throat", "dizziness", "palpitations", "edema",
+            "vomiting", "back pain", "joint pain", "chills", "weight loss", "insomnia", "syncope", "wheezing"]
+FLAGS = ["fever", "hypertension", "tachycardia", "hypoxia"]
+LABS = ["WBC", "Glucose", "Hemoglobin", "CRP", "Platelets", "ALT", "Creatinine", "TSH"]
+
+
+def synthetic_case(rng: random.Random):
+    lab_findings = ", ".join(
+        f'{{"parameter": "{lab}", "interpretation": "{rng.choice(["High", "Low"])}"}}'
+        for lab in rng.sample(LABS, rng.randint(0, 3))
+    )
+    return {
+        "raw_input": {"age": rng.randint(1, 90), "gender": rng.choice(["male", "female"])},
+        "structured_input": {
+            "symptoms": rng.sample(SYMPTOMS, rng.randint(1, 5)),
+            "vital_flags": {flag: rng.random() < 0.2 for flag in FLAGS},
+            "lab_results": {"lab_report": {"summary": f'{{"abnormal_findings": [{lab_findings}]}}'}},
+        },
+        "final_analysis": {"status": "complete", "analysis": {"probable_diagnosis": {"condition": "synthetic"}}},
+    }
+
+
+def percentiles(label: str, timings_us: list) -> str:
+    timings_us = sorted(timings_us)
+    return (f"{label} µs: p50 {statistics.median(timings_us):.0f}  "
+            f"p99 {timings_us[int(len(timings_us) * 0.99) - 1]:.0f}  max {timings_us[-1]:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--adds", type=int, default=5000, help="cases added one by one while querying")
+    parser.add_argument("--add-interval", type=float, default=0.0,
+                        help="seconds to pause after each add+query pair (0 = back to back)")
+    parser.add_argument("--dir", default="case_index_bench")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    shutil.rmtree(args.dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    index = CaseIndex(directory=args.dir)
+    batch = 50_000
+    for offset in range(0, args.cases, batch):
+        index.add_many([synthetic_case(rng) for _ in range(min(batch, args.cases - offset))])
+    print(f"built {args.cases} cases in {time.perf_counter() - start:.1f}s")
+
+    index = CaseIndex(directory=args.dir)  # reopen memory-mapped
+    queries = [synthetic_case(rng) for _ in range(args.queries)]
+    timings, hits = [], 0
+    for case in queries:
+        start = time.perf_counter()
+        match = index.query(case["structured_input"], case["raw_input"])
+        timings.append((time.perf_counter() - start) * 1e6)
+        hits += match is not None
+    print(f"{len(index)} cases, {args.queries} queries, {hits} matches")
+    print(percentiles("lookup", timings))
+
+    # Streaming phase: every add() may start a background flush and merge.
+    add_timings, query_timings = [], []
+    for i in range(args.adds):
+        case = synthetic_case(rng)
+        start = time.perf_counter()
+        index.add(case["structured_input"], case["raw_input"], case["final_analysis"])
+        add_timings.append((time.perf_counter() - start) * 1e6)
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        index.query(query["structured_input"], query["raw_input"])
+        query_timings.append((time.perf_counter() - start) * 1e6)
+        if args.add_interval:
+            time.sleep(args.add_interval)
+    index.save()
+    print(f"\nwhile adding {args.adds} cases ({len(index._segments)} segments after the final save):")
+    print(percentiles("add", add_timings))
+    print(percentiles("lookup", query_timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_question_loop.py
+"""
+Worst-case LLM calls per session for the specialist question loop.
+
+Simulates a specialist that never completes: every round returns
+status "incomplete" with fresh questions. Compares the old behaviour
+(bounded only by the graph recursion limit) with the adaptive controller
+for flat, slowly rising and quickly rising confidence.
+
+Usage (from backend/):
+    python benchmarks/bench_question_loop.py --questions 3 --recursion-limit 100
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.loop_control import SPECIALIST_CALL_BUDGET, decide_next_round  # noqa: E402
+
+# preprocess, refine_questions and triage_router each make one call before the loop starts.
+CALLS_BEFORE_LOOP = 3
+# preprocess, process_lab_reports, refine_questions, initialize_chat, triage_router.
+STEPS_BEFORE_LOOP = 5
+
+
+def fake_round(round_number: int, questions: int, confidence: float):
+    return {
+        "status": "incomplete",
+        "confidence_score": str(confidence),
+        "missing_information": [
+            f"Question {q} about topic{round_number}x{q} symptom{round_number}y{q}?" for q in range(questions)
+        ],
+    }
+
+
+def uncontrolled_calls(questions: int, recursion_limit: int) -> int:
+    # Each extra round: old re-triage + specialist + initialize_chat + one step per question.
+    steps_per_round = 3 + questions
+    rounds = max(1, (recursion_limit - STEPS_BEFORE_LOOP - questions) // steps_per_round)
+    return CALLS_BEFORE_LOOP + rounds * 2  # re-triage (20B) and specialist (120B) each round
+
+
+def controlled_calls(questions: int, confidence_step: float):
+    history = [{"status": "pending"}]
+    asked = []
+    rounds = 0
+    while True:
+        rounds += 1
+        entry = fake_round(rounds, questions, 40 + confidence_step * rounds)
+        history.append(entry)
+        keep_going, reason = decide_next_round(history, asked)
+        if not keep_going:
+            return CALLS_BEFORE_LOOP + rounds + 1, rounds + 1, reason  # + forced final analysis
+        asked.extend(entry["missing_information"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--recursion-limit", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"specialist call budget: {SPECIALIST_CALL_BUDGET}")
+    print(f"{'scenario':<34}{'LLM calls':>10}{'spec. rounds':>14}  stop reason")
+    print(f"{'uncontrolled (recursion limit)':<34}{uncontrolled_calls(args.questions, args.recursion_limit):>10}"
+          f"{'-':>14}  recursion limit")
+    for label, step in (("flat confidence", 0.0), ("confidence +3/round", 3.0), ("confidence +10/round", 10.0)):
+        start = time.perf_counter()
+        calls, rounds, reason = controlled_calls(args.questions, step)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"{'controlled, ' + label:<34}{calls:>10}{rounds:>14}  {reason} ({elapsed_us:.0f} µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/bench_report_latency.py
+"""
+Compares clinician-report latency across REPORT_MODE settings.
+
+Usage (from backend/):
+    python benchmarks/bench_report_latency.py --modes template hybrid llm --runs 5
+
+The "hybrid" and "llm" modes call Groq and need GROQ_API_KEY.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph_logic import build_report_markdown  # noqa: E402
+from benchmarks.sample_case import SAMPLE_STATE  # noqa: E402
+
+
+def bench(mode: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        build_report_markdown(SAMPLE_STATE, mode)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["template"], choices=["template", "hybrid", "llm"])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'runs':>6}{'mean ms':>12}{'p50 ms':>12}{'max ms':>12}")
+    for mode in args.modes:
+        timings = bench(mode, args.runs)
+        print(f"{mode:<10}{len(timings):>6}{statistics.mean(timings):>12.2f}"
+              f"{statistics.median(timings):>12.2f}{max(timings):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
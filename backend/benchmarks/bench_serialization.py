@@ -0,0 +1,78 @@
+# benchmarks/bench_serialization.py
+"""
+Per-session serialization CPU: the stdlib json call pattern the graph used before
+utils/serialization.py, versus the orjson-backed module with cached fragments.
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py --rounds 3 --sessions 2000
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import serialization  # noqa: E402
+from benchmarks.sample_case import SAMPLE_STATE  # noqa: E402
+
+
+def stdlib_session(state, rounds):
+    raw = state["raw_input"]
+    structured = state["structured_input"]
+    json.dumps(raw, indent=2)
+    json.dumps(raw)
+    json.dumps(structured["missing_information"])
+    json.dumps(structured["lab_results"])
+    for _ in range(rounds):
+        json.dumps(structured, indent=2)
+    report_data = {"raw_input": raw, "final_analysis": state["final_analysis"], "lab_results": structured["lab_results"]}
+    json.dumps(report_data, indent=2)
+    json.dumps({"conversation_id": "1", "pending_question": None, "total_questions": 0})
+
+
+def fast_session(state, rounds):
+    dumps, fragment = serialization.dumps, serialization.fragment
+    raw = state["raw_input"]
+    structured = state["structured_input"]
+    dumps(raw)
+    dumps(structured["missing_information"])
+    dumps(fragment(structured["lab_results"]))
+    for _ in range(rounds):
+        dumps({**structured, "lab_results": fragment(structured["lab_results"])}, indent=True)
+    report_data = {"raw_input": fragment(raw), "final_analysis": state["final_analysis"],
+                   "lab_results": fragment(structured["lab_results"])}
+    dumps(report_data, indent=True)
+    serialization.dumps_bytes({"conversation_id": "1", "pending_question": None, "total_questions": 0})
+
+
+def bench(fn, states, rounds):
+    start = time.process_time()
+    for state in states:
+        fn(state, rounds)
+    return (time.process_time() - start) / len(states) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3, help="Specialist rounds per session")
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Distinct copies per session, so fragments are only reused within a session.
+    states = [copy.deepcopy(SAMPLE_STATE) for _ in range(args.sessions)]
+    backend = "orjson" if serialization.orjson is not None else "stdlib fallback"
+
+    stdlib_us = bench(stdlib_session, states, args.rounds)
+    fast_us = bench(fast_session, states, args.rounds)
+    print(f"{'pattern':<28}{'CPU µs/session':>16}")
+    print(f"{'stdlib json':<28}{stdlib_us:>16.1f}")
+    print(f"{'serialization (' + backend + ')':<28}{fast_us:>16.1f}")
+    print(f"speedup: {stdlib_us / fast_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
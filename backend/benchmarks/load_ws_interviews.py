@@ -0,0 +1,107 @@
+# benchmarks/load_ws_interviews.py
+"""
+Load test for the /diagnose/ws interview channel on a single uvicorn worker.
+
+Start a server seeded with synthetic interview sessions (no LLM calls), then
+open one socket per session and answer every question over it:
+
+    python benchmarks/load_ws_interviews.py serve --sessions 5000 --questions 5
+    python benchmarks/load_ws_interviews.py run --connections 5000 --hold 30
+
+Each client resumes its session, answers all questions, then keeps the socket open
+for --hold seconds (answering heartbeats) so that all interviews are open together.
+Raise the open-file limit first (e.g. `ulimit -n 65536`) for thousands of sockets.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def serve(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import uvicorn
+    import main
+
+    for i in range(args.sessions):
+        questions = [f"Synthetic question {q} for session {i}?" for q in range(args.questions)]
+        main.create_session({"structured_input": {"missing_information": questions}})
+    print(f"seeded {len(main.sessions)} sessions")
+    uvicorn.run(main.app, host=args.host, port=args.port, workers=1, ws_ping_interval=None,
+                backlog=8192, log_level="warning")
+
+
+async def interview(url: str, conversation_id: str, hold: float, latencies: list, open_counter: dict):
+    import websockets
+
+    async with websockets.connect(url, ping_interval=None, open_timeout=60) as socket:
+        open_counter["now"] += 1
+        open_counter["peak"] = max(open_counter["peak"], open_counter["now"])
+        try:
+            await socket.send(json.dumps({"type": "resume", "conversation_id": conversation_id}))
+            message = json.loads(await socket.recv())
+            while message.get("type") == "question":
+                start = time.perf_counter()
+                await socket.send(json.dumps({"type": "answer", "answer": "no", "index": message["index"]}))
+                message = json.loads(await socket.recv())
+                while message.get("type") == "ping":
+                    await socket.send(json.dumps({"type": "pong"}))
+                    message = json.loads(await socket.recv())
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            deadline = time.monotonic() + hold
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    message = json.loads(await asyncio.wait_for(socket.recv(), remaining))
+                except asyncio.TimeoutError:
+                    break
+                if message.get("type") == "ping":
+                    await socket.send(json.dumps({"type": "pong"}))
+        finally:
+            open_counter["now"] -= 1
+
+
+async def run(args):
+    url = f"ws://{args.host}:{args.port}/diagnose/ws"
+    latencies, open_counter = [], {"now": 0, "peak": 0}
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(interview(url, str(i + 1), args.hold, latencies, open_counter) for i in range(args.connections)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+    errors = [r for r in results if isinstance(r, Exception)]
+
+    latencies.sort()
+    print(f"connections: {args.connections}  peak open: {open_counter['peak']}  errors: {len(errors)}")
+    if latencies:
+        print(f"answers: {len(latencies)}  round trip ms: p50 {statistics.median(latencies):.2f}  "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f}  max {latencies[-1]:.2f}")
+    print(f"wall time: {elapsed:.1f}s")
+    if errors:
+        print(f"first error: {errors[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["serve", "run"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=5000, help="serve: sessions to seed")
+    parser.add_argument("--questions", type=int, default=5, help="serve: questions per session")
+    parser.add_argument("--connections", type=int, default=5000, help="run: concurrent interviews")
+    parser.add_argument("--hold", type=float, default=10.0, help="run: seconds to keep sockets open")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        serve(args)
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
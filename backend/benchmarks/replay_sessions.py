@@ -0,0 +1,108 @@
+# benchmarks/replay_sessions.py
+"""
+Replays recorded sessions through `graph` offline and reports per-node CPU time and memory.
+
+Record a trace against the live models first:
+    LLM_TRACE_MODE=record LLM_TRACE_FILE=prod.trace uvicorn main:app
+
+Then, from backend/:
+    python benchmarks/replay_sessions.py prod.trace --inputs sessions.json --out new.json
+    python benchmarks/replay_sessions.py prod.trace --inputs sessions.json --compare old.json
+
+`--inputs` is a JSON list of raw patient inputs (defaults to the bundled sample case).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="Trace file written with LLM_TRACE_MODE=record")
+    parser.add_argument("--inputs", help="JSON list of raw patient inputs to replay")
+    parser.add_argument("--latency", choices=["zero", "real"], default="zero")
+    parser.add_argument("--out", help="Write per-node stats as JSON")
+    parser.add_argument("--compare", help="Per-node stats JSON from a previous version")
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# Tracing is configured when utils.llm is imported, so set it up before importing the graph.
+os.environ["LLM_TRACE_MODE"] = "replay"
+os.environ["LLM_TRACE_FILE"] = args.trace
+os.environ["LLM_TRACE_LATENCY"] = args.latency
+os.environ.setdefault("NODE_CACHE_ENABLED", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+
+from langgraph_logic import graph  # noqa: E402
+from benchmarks.sample_case import SAMPLE_RAW_INPUT  # noqa: E402
+
+
+class NodeProfiler(BaseCallbackHandler):
+    """Accumulates CPU time, wall time and peak traced memory for each graph node run."""
+
+    def __init__(self):
+        self._open = {}
+        self.stats = defaultdict(lambda: {"calls": 0, "cpu_ms": 0.0, "wall_ms": 0.0, "peak_kb": 0.0})
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the prompt | llm chains nested inside it.
+        if node and kwargs.get("name") == node:
+            tracemalloc.reset_peak()
+            self._open[run_id] = (node, time.process_time(), time.perf_counter(), tracemalloc.get_traced_memory()[0])
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id not in self._open:
+            return
+        node, cpu_start, wall_start, mem_start = self._open.pop(run_id)
+        entry = self.stats[node]
+        entry["calls"] += 1
+        entry["cpu_ms"] += (time.process_time() - cpu_start) * 1000
+        entry["wall_ms"] += (time.perf_counter() - wall_start) * 1000
+        entry["peak_kb"] = max(entry["peak_kb"], (tracemalloc.get_traced_memory()[1] - mem_start) / 1024)
+
+    on_chain_error = on_chain_end
+
+
+def main():
+    inputs = [SAMPLE_RAW_INPUT]
+    if args.inputs:
+        with open(args.inputs) as f:
+            inputs = json.load(f)
+
+    profiler = NodeProfiler()
+    tracemalloc.start()
+    for raw_input in inputs:
+        graph.invoke({"raw_input": raw_input}, {"recursion_limit": 100, "callbacks": [profiler]})
+    tracemalloc.stop()
+
+    stats = dict(profiler.stats)
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    print(f"{'node':<28}{'calls':>6}{'cpu ms':>10}{'wall ms':>10}{'peak KB':>10}{'Δcpu %':>9}")
+    for node, entry in sorted(stats.items(), key=lambda item: -item[1]["cpu_ms"]):
+        delta = ""
+        if node in previous and previous[node]["cpu_ms"]:
+            delta = f"{(entry['cpu_ms'] / previous[node]['cpu_ms'] - 1) * 100:+.1f}"
+        print(f"{node:<28}{entry['calls']:>6}{entry['cpu_ms']:>10.2f}{entry['wall_ms']:>10.2f}"
+              f"{entry['peak_kb']:>10.1f}{delta:>9}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/sample_case.py
+"""A representative completed session, shared by the offline benchmarks."""
+
+SAMPLE_RAW_INPUT = {
+    "Name": "Sarab",
+    "age": 28,
+    "weight": 70,
+    "gender": "male",
+    "blood_group": "O+",
+    "symptoms": "Have an itchy red rash on my arm for three days, and I've had a fever.",
+    "duration": "3 days",
+    "vitals": {"temperature": "101.5 F", "bp": "110/70", "pulse": "96", "spo2": "97%"}
+}
+
+SAMPLE_LAB_RESULTS = {
+    "lab_report": {
+        "summary": (
+            '{"abnormal_findings": ['
+            '{"parameter": "WBC", "value": "15.2", "standard_range": "4.5-11.0", "interpretation": "High"}, '
+            '{"parameter": "Glucose", "value": "160", "standard_range": "70-140", "interpretation": "High"}], '
+            '"concerns": ["Possible bacterial infection", "Hyperglycemia"]}'
+        )
+    }
+}
+
+SAMPLE_FINAL_ANALYSIS = {
+    "status": "complete",
+    "analysis": {
+        "probable_diagnosis": {
+            "condition": "Cellulitis",
+            "confidence_score": "82",
+            "reasoning": "Localized erythematous, pruritic rash with fever and leukocytosis suggests a bacterial skin infection.",
+            "evidence": [
+                "Patient report of fever (101.5°F)",
+                "Red, itchy rash on the arm for three days",
+                "Elevated WBC (15.2)"
+            ],
+            "urgency": "Medium"
+        },
+        "differential_diagnosis": [
+            {"condition": "Contact dermatitis", "reasoning": "Itchy rash, but fever and leukocytosis are atypical."},
+            {"condition": "Viral exanthem", "reasoning": "Fever with rash, but the rash is localized."}
+        ],
+        "recommended_tests": ["CBC with differential", "Blood culture if fever persists", "HbA1c"],
+        "suggested_medications": ["Oral cephalexin", "Antipyretics as needed"],
+        "medication_disclaimer": "A qualified human doctor must make the final prescribing decision."
+    }
+}
+
+SAMPLE_STATE = {
+    "raw_input": SAMPLE_RAW_INPUT,
+    "structured_input": {
+        "symptoms": ["rash", "pruritus", "fever"],
+        "severity": "Moderate",
+        "vital_flags": {"fever": True, "hypertension": False, "tachycardia": False, "hypoxia": False},
+        "missing_information": [],
+        "lab_results": SAMPLE_LAB_RESULTS
+    },
+    "messages": [],
+    "diagnosis_path": "dermatology",
+    "final_analysis": SAMPLE_FINAL_ANALYSIS,
+    "analysis_history": [SAMPLE_FINAL_ANALYSIS]
+}
@@ -2,6 +2,7 @@
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, TypedDict, cast
 
 import fitz  # PyMuPDF
@@ -17,7 +18,14 @@ from utils.llm import (
     cardiology_llm,
     dermatology_llm
 )
-from utils.pdf_generator import create_pdf_report
+from utils.node_cache import memoize_node
+from utils.serialization import dumps, fragment, loads
+from utils.artifact_store import report_store
+from utils.case_index import case_index
+from utils.loop_control import decide_next_round, loop_metrics, specialist_rounds
+from utils.pdf_generator import store_pdf_report
+from utils.report_template import render_report_markdown
+from utils.vitals import precompute_intake
 from utils.prompts import (
     intake_prompt,
     lab_prompt,
@@ -26,12 +34,16 @@ from utils.prompts import (
     cardiology_prompt,
     dermatology_prompt,
     question_refinement_prompt,
-    medical_report_prompt
+    medical_report_prompt,
+    report_narrative_prompt
 )
 
 # Load environment variables from .env file
 load_dotenv()
 
+# "template" (default), "hybrid" (template + LLM narrative) or "llm" (full LLM-written report)
+REPORT_MODE = os.getenv("REPORT_MODE", "template")
+
 
 # --- AGENT STATE DEFINITION ---
 class PatientState(TypedDict, total=False):
@@ -45,7 +57,9 @@ class PatientState(TypedDict, total=False):
     diagnosis_path: str
     final_analysis: Dict[str, Any]
     report_path: str
+    report_id: str
     analysis_history: List[Dict[str, Any]]
+    routing_fallback: bool
 
 
 # --- UTILITY FUNCTIONS ---
@@ -70,21 +84,26 @@ def summarize_lab_report(pdf_path):
 
 # --- GRAPH NODE DEFINITIONS ---
 
+@memoize_node(
+    reads=["raw_input", "messages"],
+    prompt=intake_prompt,
+    model=llm,
+    cacheable=lambda delta: "parsing_error" not in delta.get("structured_input", {})
+)
 def preprocess_node(state: PatientState) -> Dict[str, Any]:
     """Takes the initial raw data and creates the first structured summary."""
     print("--- 📝 PREPROCESSING INITIAL DATA ---")
     raw = state.get("raw_input", {})
     messages = state.get("messages", [])
-    messages.append({"role": "human", "content": f"Patient provided input:\n{json.dumps(raw, indent=2)}"})
+    raw_json = dumps(raw)
+    messages.append({"role": "human", "content": f"Patient provided input:\n{raw_json}"})
 
+    precomputed = precompute_intake(raw)
     chain = intake_prompt | llm
-    vitals = (raw.get("vitals") or {})
     llm_response = chain.invoke({
-        "patient_data": json.dumps(raw),
-        "temperature": vitals.get("temperature", ""),
-        "bp": vitals.get("bp", ""),
-        "pulse": vitals.get("pulse", ""),
-        "spo2": vitals.get("spo2", "")
+        "patient_data": raw_json,
+        "vital_flags": dumps(precomputed["vital_flags"]),
+        "known_missing": dumps(precomputed["missing_questions"])
     })
     messages.append({"role": "ai", "content": llm_response.content})
 
@@ -96,10 +115,16 @@ def preprocess_node(state: PatientState) -> Dict[str, Any]:
     cleaned_content = cleaned_content.strip()
 
     try:
-        structured_input = json.loads(cleaned_content)
+        structured_input = loads(cleaned_content)
     except Exception as e:
         structured_input = {"raw_llm_output": llm_response.content, "parsing_error": str(e)}
 
+    # Vitals are interpreted locally; the model only adds clinical follow-up questions.
+    llm_questions = structured_input.get("missing_information") or []
+    structured_input["normalized_vitals"] = precomputed["normalized_vitals"]
+    structured_input["vital_flags"] = precomputed["vital_flags"]
+    structured_input["missing_information"] = list(dict.fromkeys(precomputed["missing_questions"] + llm_questions))
+
     return {"structured_input": structured_input, "messages": messages}
 
 
@@ -119,6 +144,7 @@ def process_all_lab_reports_node(state: PatientState) -> Dict[str, Any]:
     return {"structured_input": structured_input}
 
 
+@memoize_node(reads=["structured_input"], prompt=question_refinement_prompt, model=llm, cacheable=bool)
 def refine_questions_node(state: PatientState) -> Dict[str, Any]:
     """Refines the initial questions based on lab report findings."""
     print("--- 🧠 REFINING QUESTIONS BASED ON LABS ---")
@@ -132,12 +158,12 @@ def refine_questions_node(state: PatientState) -> Dict[str, Any]:
 
     chain = question_refinement_prompt | llm
     llm_response = chain.invoke({
-        "initial_questions": json.dumps(initial_questions),
-        "lab_summary": json.dumps(lab_summary)
+        "initial_questions": dumps(initial_questions),
+        "lab_summary": dumps(fragment(lab_summary))
     })
 
     try:
-        response_json = json.loads(llm_response.content)
+        response_json = loads(llm_response.content)
         refined_questions = response_json.get("refined_questions", initial_questions)
         updated_structured_input = structured_input.copy()
         updated_structured_input["missing_information"] = refined_questions
@@ -177,6 +203,10 @@ def ask_one_question_node(state: PatientState) -> PatientState:
     return state
 
 
+@memoize_node(
+    reads=["raw_input.symptoms"], prompt=triage_router_prompt, model=triage_llm,
+    cacheable=lambda delta: not delta.get("routing_fallback")
+)
 def triage_router_node(state: PatientState) -> Dict[str, Any]:
     """This node logs an initial status and routes to a specialist."""
     print("--- 📧 Triage Router ---")
@@ -195,19 +225,43 @@ def triage_router_node(state: PatientState) -> Dict[str, Any]:
     llm_response = chain.invoke({"primary_complaint": primary_complaint})
 
     try:
-        route_json = json.loads(llm_response.content)
+        route_json = loads(llm_response.content)
         department = route_json.get("department", "general_medicine")
+        if department not in SPECIALISTS:
+            # Only departments the graph has an edge for can be routed to; don't cache the fallback.
+            print(f"--- Triage Router: Unknown department {department!r}, defaulting to general_medicine ---")
+            return {"diagnosis_path": "general_medicine", "analysis_history": analysis_history, "routing_fallback": True}
         print(f"--- Triage Router: Routing to {department} ---")
-        return {"diagnosis_path": department, "analysis_history": analysis_history}
+        return {"diagnosis_path": department, "analysis_history": analysis_history, "routing_fallback": False}
     except Exception:
         print("--- Triage Router: Defaulting to general_medicine due to parsing error ---")
-        return {"diagnosis_path": "general_medicine", "analysis_history": analysis_history}
+        return {"diagnosis_path": "general_medicine", "analysis_history": analysis_history, "routing_fallback": True}
 
 
-def run_specialist_analysis(state: PatientState, specialist_prompt, specialist_llm) -> Dict[str, Any]:
+FORCE_FINAL_DIRECTIVE = (
+    "system: The question phase has ended and no further answers can be collected. "
+    "You MUST output format A (status \"complete\") using only the information available."
+)
+
+
+def run_specialist_analysis(state: PatientState, specialist_prompt, specialist_llm,
+                            force_final: bool = False) -> Dict[str, Any]:
     """Helper function to run analysis for any specialist and update the history."""
-    structured_data = json.dumps(state.get("structured_input", {}), indent=2)
+    structured_input = state.get("structured_input", {})
+    raw_input = state.get("raw_input", {})
+
+    # Offer the analysis of a near-identical earlier case as a draft for the specialist.
+    similar_case = case_index.query(structured_input, raw_input)
+    if similar_case:
+        print(f"--- 🔁 Similar prior case found (similarity {similar_case['similarity']:.2f}) ---")
+        structured_input = {**structured_input, "similar_prior_case": similar_case["final_analysis"]}
+    # lab_results is unchanged across rounds, so it is only encoded once per session.
+    if structured_input.get("lab_results"):
+        structured_input = {**structured_input, "lab_results": fragment(structured_input["lab_results"])}
+    structured_data = dumps(structured_input, indent=True)
     conversation_history = "\n".join([f"{msg['role']}: {msg['content']}" for msg in state.get("messages", [])])
+    if force_final:
+        conversation_history += "\n" + FORCE_FINAL_DIRECTIVE
 
     chain = specialist_prompt | specialist_llm
     llm_response = chain.invoke({"structured_data": structured_data, "conversation_history": conversation_history})
@@ -218,7 +272,7 @@ def run_specialist_analysis(state: PatientState, specialist_prompt, specialist_l
     cleaned_content = cleaned_content.strip()
 
     try:
-        response_json = json.loads(cleaned_content)
+        response_json = loads(cleaned_content)
         analysis_history = state.get("analysis_history", []).copy()
         analysis_history.append(response_json)
 
@@ -234,6 +288,9 @@ def run_specialist_analysis(state: PatientState, specialist_prompt, specialist_l
             updates["structured_input"] = updated_structured_input
         else:
             print("--- ✅ ANALYSIS COMPLETE ---")
+            # Exact repeats of an indexed case would only add duplicates.
+            if response_json.get("status") == "complete" and not (similar_case and similar_case["similarity"] >= 1.0):
+                case_index.add(state.get("structured_input", {}), raw_input, response_json)
 
         return updates
     except Exception as e:
@@ -259,22 +316,77 @@ def dermatology_analysis_node(state: PatientState) -> Dict[str, Any]:
     return run_specialist_analysis(state, dermatology_prompt, dermatology_llm)
 
 
-def generate_report_node(state: PatientState) -> Dict[str, str]:
-    """Takes the final analysis and generates a downloadable PDF report."""
-    print("--- ✍️ Generating final clinician report... ---")
+SPECIALISTS = {
+    "general_medicine": (general_medicine_prompt, general_medicine_llm),
+    "cardiology": (cardiology_prompt, cardiology_llm),
+    "dermatology": (dermatology_prompt, dermatology_llm),
+}
+
+
+def force_final_analysis_node(state: PatientState) -> Dict[str, Any]:
+    """Runs the routed specialist one last time, instructing it to commit to a final analysis."""
+    print("--- 🛑 QUESTION LOOP STOPPED: FORCING FINAL ANALYSIS ---")
+    specialist_prompt, specialist_llm = SPECIALISTS.get(
+        state.get("diagnosis_path", "general_medicine"), SPECIALISTS["general_medicine"]
+    )
+    return run_specialist_analysis(state, specialist_prompt, specialist_llm, force_final=True)
 
+
+def build_report_markdown(state: PatientState, mode: str = "template") -> str:
+    """
+    Builds the clinician report Markdown.
+
+    - "template": structured sections rendered locally, no LLM call.
+    - "hybrid":   template plus a short LLM narrative, requested concurrently with rendering.
+    - "llm":      the original full-report LLM call.
+    """
+    structured_input = state.get("structured_input", {})
     report_data = {
         "raw_input": state.get("raw_input"),
         "final_analysis": state.get("final_analysis", {}),
-        "lab_results": state.get("structured_input", {}).get("lab_results")
+        "lab_results": structured_input.get("lab_results")
+    }
+    # raw_input and lab_results were already encoded by earlier nodes.
+    encoded_report_data = {
+        "raw_input": fragment(report_data["raw_input"]),
+        "final_analysis": report_data["final_analysis"],
+        "lab_results": fragment(report_data["lab_results"])
     }
-    final_json_data = json.dumps(report_data, indent=2)
 
-    report_chain = medical_report_prompt | llm
-    markdown_report = report_chain.invoke({"final_json_data": final_json_data}).content
+    if mode == "llm":
+        report_chain = medical_report_prompt | llm
+        return report_chain.invoke({"final_json_data": dumps(encoded_report_data, indent=True)}).content
+
+    render_args = (
+        report_data["raw_input"],
+        report_data["final_analysis"],
+        report_data["lab_results"],
+        structured_input.get("vital_flags")
+    )
+    if mode != "hybrid":
+        return render_report_markdown(*render_args)
+
+    narrative_chain = report_narrative_prompt | llm
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        narrative_future = executor.submit(narrative_chain.invoke, {"final_json_data": dumps(encoded_report_data)})
+        # Render once without the narrative while the model works, so a failed call still yields a report.
+        markdown_report = render_report_markdown(*render_args)
+        try:
+            narrative = narrative_future.result().content
+        except Exception as e:
+            print(f"--- ⚠️ Narrative summary failed, using template only: {e} ---")
+            return markdown_report
+    return render_report_markdown(*render_args, narrative=narrative)
+
 
-    file_path = create_pdf_report(markdown_report)
-    return {"report_path": file_path}
+def generate_report_node(state: PatientState) -> Dict[str, str]:
+    """Takes the final analysis and generates a downloadable PDF report."""
+    print(f"--- ✍️ Generating final clinician report ({REPORT_MODE} mode)... ---")
+    markdown_report = build_report_markdown(state, REPORT_MODE)
+    report_id = store_pdf_report(markdown_report)
+    if report_id is None:
+        return {}
+    return {"report_id": report_id, "report_path": report_store.path_for(report_id)}
 
 
 # --- CONDITIONAL ROUTERS ---
@@ -296,6 +408,11 @@ def decide_to_continue_chat(state: PatientState) -> str:
     if state.get("question_queue"):
         print("--- ROUTING TO: ask_one_question (More questions remain) ---")
         return "continue_chat"
+    elif state.get("diagnosis_path"):
+        # Follow-up round: go straight back to the specialist instead of re-triaging,
+        # which would also reset analysis_history.
+        print(f"--- ROUTING TO: {state['diagnosis_path']} (Follow-up answers collected) ---")
+        return route_to_specialist(state)
     else:
         print("--- ROUTING TO: triage_router (All questions asked) ---")
         return "end_chat"
@@ -312,11 +429,27 @@ def decide_after_analysis(state: PatientState) -> str:
     final_analysis = state.get("final_analysis", {})
     status = final_analysis.get("status", "complete")
 
+    analysis_history = state.get("analysis_history", [])
+    rounds = len(specialist_rounds(analysis_history))
+
     if status == "incomplete" and final_analysis.get("missing_information"):
-        print("--- ROUTING TO: initialize_chat (Specialist has more questions) ---")
-        return "ask_more_questions"
+        asked_questions = [msg["content"] for msg in state.get("messages", []) if msg.get("role") == "ai"]
+        keep_going, reason = decide_next_round(analysis_history, asked_questions)
+        if keep_going:
+            print("--- ROUTING TO: initialize_chat (Specialist has more questions) ---")
+            return "ask_more_questions"
+        print(f"--- ROUTING TO: force_final_analysis ({reason}) ---")
+        loop_metrics.record(rounds + 1, reason)
+        return "force_final"
     else:
-        print("--- ROUTING TO: generate_report (Analysis is complete) ---")
+        if "error" in final_analysis:
+            reason = "parse_error"
+        elif status == "incomplete":
+            reason = "incomplete_no_questions"
+        else:
+            reason = "complete"
+        print(f"--- ROUTING TO: generate_report ({reason}) ---")
+        loop_metrics.record(rounds, reason)
         return "end_process"
 
 
@@ -336,6 +469,7 @@ builder.add_node("triage_router", triage_router_node)
 builder.add_node("general_medicine_analysis", general_medicine_analysis_node)
 builder.add_node("cardiology_analysis", cardiology_analysis_node)
 builder.add_node("dermatology_analysis", dermatology_analysis_node)
+builder.add_node("force_final_analysis", force_final_analysis_node)
 builder.add_node("generate_report", generate_report_node)
 
 # Define the graph's edges and conditional routes
@@ -353,7 +487,13 @@ builder.add_edge("initialize_chat", "ask_one_question")
 builder.add_conditional_edges(
     "ask_one_question",
     decide_to_continue_chat,
-    {"continue_chat": "ask_one_question", "end_chat": "triage_router"}
+    {
+        "continue_chat": "ask_one_question",
+        "end_chat": "triage_router",
+        "general_medicine": "general_medicine_analysis",
+        "cardiology": "cardiology_analysis",
+        "dermatology": "dermatology_analysis"
+    }
 )
 
 builder.add_conditional_edges(
@@ -368,14 +508,18 @@ builder.add_conditional_edges(
 
 specialist_routing_map = {
     "end_process": "generate_report",
-    "ask_more_questions": "initialize_chat"
+    "ask_more_questions": "initialize_chat",
+    "force_final": "force_final_analysis"
 }
 builder.add_conditional_edges("general_medicine_analysis", decide_after_analysis, specialist_routing_map)
 builder.add_conditional_edges("cardiology_analysis", decide_after_analysis, specialist_routing_map)
 builder.add_conditional_edges("dermatology_analysis", decide_after_analysis, specialist_routing_map)
 
+builder.add_edge("force_final_analysis", "generate_report")
 builder.add_edge("generate_report", END)
 
+graph = builder.compile()
+
 
 
 # --- MAIN EXECUTION BLOCK ---
@@ -1,12 +1,39 @@
 # backend/main.py
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import itertools
+import os
+from email.utils import parsedate_to_datetime
+
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel, ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional
 
 from langgraph_logic import graph
+from utils.admission import AdmissionRejected, admission_controller, score_urgency
+from utils.artifact_store import report_store
+from utils.loop_control import loop_metrics
+from utils.node_cache import node_cache
+from utils.serialization import dumps, dumps_bytes, loads
+
+# Seconds of silence before the server pings an interview socket, and how long it waits for the pong.
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "20"))
+WS_HEARTBEAT_TIMEOUT = float(os.getenv("WS_HEARTBEAT_TIMEOUT", "10"))
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Renders responses with the orjson-backed serializer instead of the stdlib json module.
+    Endpoints return it directly so FastAPI skips the jsonable_encoder pass over the payload.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
 
-app = FastAPI()
+
+app = FastAPI(default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +41,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
@@ -48,14 +76,13 @@ sessions: Dict[str, Dict] = {}
 session_questions: Dict[str, List] = {}
 session_index: Dict[str, int] = {}
 session_answers: Dict[str, List] = {}
+session_ids = itertools.count(1)
 
 
 
-@app.post("/diagnose/start")
-def start(patient: HigherData):
-    patient_dict = patient.dict()
-    state = graph.invoke({"raw_input": patient_dict}, {"recursion_limit": 100})
-    session_id = str(len(sessions) + 1)
+def create_session(state: Dict[str, Any], session_id: str = None) -> Dict[str, Any]:
+    """Stores a finished graph run as an interview session and returns its first question."""
+    session_id = session_id or str(next(session_ids))
 
     sessions[session_id] = state
     session_questions[session_id] = state.get("structured_input", {}).get("missing_information", [])
@@ -67,23 +94,23 @@ def start(patient: HigherData):
         first_question = session_questions[session_id][0]
         session_index[session_id] = 1
 
+    report_id = state.get("report_id")
     return {
         "conversation_id": session_id,
         "pending_question": first_question,
-        "total_questions": len(session_questions[session_id])
+        "total_questions": len(session_questions[session_id]),
+        "report_id": report_id,
+        "report_url": f"/reports/{report_id}" if report_id else None
     }
 
 
-@app.post("/diagnose/continue")
-def continue_chat(req: ChatRequest, conversation_id: str):
-    if conversation_id not in sessions:
-        return {"error": "Invalid conversation_id"}
-
+def record_answer(conversation_id: str, answer: str) -> Dict[str, Any]:
+    """Saves an answer and advances the session to its next question."""
     idx = session_index[conversation_id]
     questions = session_questions[conversation_id]
 
     # Save previous answer
-    session_answers[conversation_id].append(req.answer)
+    session_answers[conversation_id].append(answer)
 
     if idx >= len(questions):
         return {
@@ -101,3 +128,299 @@ def continue_chat(req: ChatRequest, conversation_id: str):
         "pending_question": question,
         "remaining": len(questions) - idx
     }
+
+
+def admission_level(patient_data: Dict[str, Any]) -> str:
+    return score_urgency(patient_data.get("vitals"), patient_data.get("symptoms", ""))["level"]
+
+
+@app.post("/diagnose/start")
+async def start(patient: HigherData):
+    patient_dict = patient.model_dump()
+    try:
+        async with admission_controller.admit(admission_level(patient_dict["patient_data"])):
+            state = await run_in_threadpool(graph.invoke, {"raw_input": patient_dict}, {"recursion_limit": 100})
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail={"error": "Server busy, please retry", "urgency": e.level, "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return FastJSONResponse(create_session(state))
+
+
+@app.post("/diagnose/continue")
+def continue_chat(req: ChatRequest, conversation_id: str):
+    if conversation_id not in sessions:
+        return FastJSONResponse({"error": "Invalid conversation_id"})
+    return FastJSONResponse(record_answer(conversation_id, req.answer))
+
+
+# --- WEBSOCKET INTERVIEW CHANNEL ---
+
+def interview_message(conversation_id: str) -> Dict[str, Any]:
+    """The question the session is waiting on, or a done message. Used on every (re)connect."""
+    idx = session_index[conversation_id]
+    questions = session_questions[conversation_id]
+    if len(session_answers[conversation_id]) < idx:
+        return {
+            "type": "question",
+            "conversation_id": conversation_id,
+            "index": idx - 1,
+            "question": questions[idx - 1],
+            "total": len(questions)
+        }
+    return {
+        "type": "done",
+        "conversation_id": conversation_id,
+        "final_analysis": {"answers": session_answers[conversation_id]}
+    }
+
+
+async def send_message(websocket: WebSocket, message: Dict[str, Any]) -> None:
+    await websocket.send_text(dumps(message))
+
+
+class GraphRun:
+    """
+    A graph run started over the WebSocket. It is not tied to the socket that started
+    it: the session is created when the graph finishes even if that socket is gone,
+    and a reconnecting client can follow it again by its conversation_id.
+    """
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+        self.finished = False
+        self.task = None  # keeps the running task referenced
+        self._changed = asyncio.Event()
+
+    def publish(self, message: Dict[str, Any], final: bool = False) -> None:
+        self.messages.append(message)
+        self.finished = self.finished or final
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        """Waits for the next message."""
+        await self._changed.wait()
+
+
+graph_runs: Dict[str, GraphRun] = {}
+
+
+async def stream_graph(run: GraphRun, patient_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs the graph in a worker thread, publishing node progress and analyses as they are produced."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for item in graph.stream({"raw_input": patient_dict}, {"recursion_limit": 100},
+                                     stream_mode=["updates", "values"]):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("end", None))
+
+    producer = loop.run_in_executor(None, produce)
+    state: Dict[str, Any] = {}
+    try:
+        while True:
+            mode, chunk = await queue.get()
+            if mode == "end":
+                break
+            if mode == "error":
+                raise chunk
+            if mode == "values":
+                state = chunk
+                continue
+            for node, delta in chunk.items():
+                message = {"type": "progress", "node": node}
+                if node.endswith("_analysis") and delta and "final_analysis" in delta:
+                    message["final_analysis"] = delta["final_analysis"]
+                run.publish(message)
+    finally:
+        # The worker thread cannot be interrupted. Return only once it is done, so the caller's
+        # admission slot stays taken for as long as the graph is really using LLM capacity.
+        await asyncio.shield(producer)
+    return state
+
+
+async def execute_graph_run(conversation_id: str, run: GraphRun, patient_data: Dict[str, Any]) -> None:
+    try:
+        async with admission_controller.admit(admission_level(patient_data)):
+            state = await stream_graph(run, patient_data)
+        session = create_session(state, conversation_id)
+        run.publish({"type": "session", **session}, final=True)
+    except AdmissionRejected as e:
+        run.publish({"type": "busy", "urgency": e.level, "retry_after": e.retry_after}, final=True)
+    except Exception as e:
+        print(f"--- ❌ Diagnosis failed: {e} ---")
+        run.publish({"type": "error", "detail": "Diagnosis failed"}, final=True)
+    finally:
+        if not run.finished:  # cancelled, e.g. on shutdown
+            run.publish({"type": "error", "detail": "Diagnosis cancelled"}, final=True)
+        graph_runs.pop(conversation_id, None)
+
+
+async def follow_graph_run(websocket: WebSocket, run: GraphRun, seen: int = 0) -> None:
+    """Relays a run's messages from index `seen` until it finishes."""
+    while True:
+        while seen < len(run.messages):
+            await send_message(websocket, run.messages[seen])
+            seen += 1
+        if run.finished:
+            return
+        await run.wait()
+
+
+@app.websocket("/diagnose/ws")
+async def interview_socket(websocket: WebSocket):
+    """
+    One connection per interview. Client messages:
+      {"type": "start", "patient_data": {...}}   run the graph and begin the interview
+      {"type": "resume", "conversation_id": id}  re-attach after a reconnect, also while the graph runs
+      {"type": "answer", "answer": str, "index": n}  answer the pending question
+      {"type": "ping"} / {"type": "pong"}        heartbeat
+
+    A start is acknowledged with {"type": "accepted", "conversation_id": id} before the
+    graph runs, then answered with progress messages and a session, or with
+    {"type": "busy", "retry_after": s} when the admission controller sheds it.
+
+    The run is relayed by a separate task, so this loop keeps reading while the graph
+    runs and the heartbeat (ping, then close if no pong) applies throughout.
+    """
+    await websocket.accept()
+    conversation_id = None
+    awaiting_pong = False
+    follower: Optional[asyncio.Task] = None
+
+    async def follow(run_id: str, run: GraphRun, seen: int = 0) -> None:
+        nonlocal conversation_id
+        await follow_graph_run(websocket, run, seen)
+        if run_id in sessions:
+            conversation_id = run_id
+            await send_message(websocket, interview_message(conversation_id))
+
+    try:
+        while True:
+            try:
+                raw = await asyncio.wait_for(
+                    websocket.receive_text(),
+                    WS_HEARTBEAT_TIMEOUT if awaiting_pong else WS_HEARTBEAT_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                if awaiting_pong:
+                    await websocket.close(code=status.WS_1001_GOING_AWAY)
+                    return
+                awaiting_pong = True
+                await send_message(websocket, {"type": "ping"})
+                continue
+
+            awaiting_pong = False
+            try:
+                message = loads(raw)
+            except ValueError:
+                await send_message(websocket, {"type": "error", "detail": "Messages must be JSON"})
+                continue
+            if not isinstance(message, dict):
+                await send_message(websocket, {"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            kind = message.get("type")
+
+            if kind == "pong":
+                continue
+            if kind == "ping":
+                await send_message(websocket, {"type": "pong"})
+            elif kind in ("start", "resume") and follower and not follower.done():
+                await send_message(websocket, {"type": "error", "detail": "A diagnosis is already running"})
+            elif kind == "start":
+                try:
+                    patient = HigherData.model_validate({"patient_data": message.get("patient_data")})
+                except ValidationError as e:
+                    await send_message(websocket, {"type": "error", "detail": e.errors(include_url=False)})
+                    continue
+                run_id = str(next(session_ids))
+                run = graph_runs[run_id] = GraphRun()
+                run.task = asyncio.create_task(execute_graph_run(run_id, run, patient.model_dump()["patient_data"]))
+                await send_message(websocket, {"type": "accepted", "conversation_id": run_id})
+                follower = asyncio.create_task(follow(run_id, run))
+            elif kind == "resume":
+                resume_id = message.get("conversation_id")
+                if not isinstance(resume_id, str) or (resume_id not in sessions and resume_id not in graph_runs):
+                    await send_message(websocket, {"type": "error", "detail": "Invalid conversation_id"})
+                    continue
+                if resume_id not in sessions:
+                    run = graph_runs[resume_id]
+                    follower = asyncio.create_task(follow(resume_id, run, seen=len(run.messages)))
+                    continue
+                conversation_id = resume_id
+                await send_message(websocket, interview_message(conversation_id))
+            elif kind == "answer":
+                if conversation_id is None:
+                    await send_message(websocket, {"type": "error", "detail": "No active interview"})
+                    continue
+                answer = message.get("answer", "")
+                index = message.get("index")
+                if not isinstance(answer, str) or (index is not None and type(index) is not int):
+                    await send_message(websocket, {"type": "error", "detail": "answer must be a string, index an integer"})
+                    continue
+                pending = interview_message(conversation_id)
+                # Answers re-sent after a reconnect carry the index they answer; drop duplicates.
+                if pending["type"] == "question" and (index is None or index == pending["index"]):
+                    record_answer(conversation_id, answer)
+                await send_message(websocket, interview_message(conversation_id))
+            else:
+                await send_message(websocket, {"type": "error", "detail": f"Unknown message type: {kind!r}"})
+    except WebSocketDisconnect:
+        return
+    finally:
+        # Only the relay stops; the graph run itself carries on without the socket.
+        if follower:
+            follower.cancel()
+            await asyncio.gather(follower, return_exceptions=True)
+
+
+def not_modified_since(if_modified_since: str, path: str) -> bool:
+    """True when the file is no newer than the If-Modified-Since date. Unparseable dates are ignored."""
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return int(os.stat(path).st_mtime) <= since.timestamp()
+
+
+@app.api_route("/reports/{report_id}", methods=["GET", "HEAD"])
+def download_report(report_id: str, request: Request):
+    # Reports are content-addressed, so the key itself is a strong ETag and never changes.
+    path = report_store.get(report_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    etag = f'"{report_id}"'
+    # Reports contain patient data: browsers may cache them, shared caches must not.
+    cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=cache_headers)
+    elif request.headers.get("if-modified-since"):
+        if not_modified_since(request.headers["if-modified-since"], path):
+            return Response(status_code=304, headers=cache_headers)
+
+    # FileResponse streams the file and handles Range / If-Range requests.
+    return FileResponse(path, media_type="application/pdf", filename="summary.pdf", headers=cache_headers)
+
+
+@app.get("/metrics")
+def metrics():
+    return FastJSONResponse({
+        "interview_loop": loop_metrics.snapshot(),
+        "node_cache": node_cache.stats(),
+        "admission": admission_controller.snapshot()
+    })
@@ -0,0 +1,8 @@
+# tests/conftest.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils/__init__ builds the Groq clients at import time; the tests never call them.
+os.environ.setdefault("GROQ_API_KEY", "test")
@@ -0,0 +1,113 @@
+# tests/test_admission.py
+import asyncio
+
+import pytest
+
+from utils.admission import AdmissionController, AdmissionRejected, score_urgency
+
+NORMAL_VITALS = {"temperature": "37.0 C", "bp": "120/80", "pulse": "80", "spo2": "98"}
+
+
+@pytest.mark.parametrize("vitals, symptoms, level", [
+    (NORMAL_VITALS, "mild rash", "routine"),
+    (NORMAL_VITALS, "chest pain since this morning", "critical"),
+    (NORMAL_VITALS, "no chest pain, mild rash", "routine"),
+    (NORMAL_VITALS, "denies chest pain or shortness of breath", "routine"),
+    (NORMAL_VITALS, "rash without vomiting", "routine"),
+    (NORMAL_VITALS, "no fever but chest pain", "critical"),
+    (NORMAL_VITALS, "not dizzy; had a seizure", "critical"),
+    (NORMAL_VITALS, "severe headache", "urgent"),
+    ({**NORMAL_VITALS, "spo2": "SpO2 92"}, "cough", "critical"),
+    ({**NORMAL_VITALS, "spo2": "SpO2 97"}, "cough", "routine"),
+    ({**NORMAL_VITALS, "temperature": "40.1 C"}, "", "critical"),
+    ({**NORMAL_VITALS, "bp": "185/100"}, "", "critical"),
+    ({**NORMAL_VITALS, "temperature": "101.5 F"}, "", "urgent"),
+    ({**NORMAL_VITALS, "pulse": "HR 120"}, "", "urgent"),
+    (None, "", "routine"),
+])
+def test_score_urgency(vitals, symptoms, level):
+    assert score_urgency(vitals, symptoms)["level"] == level
+
+
+def controller(**overrides):
+    settings = {
+        "max_concurrency": 4,
+        "class_limits": {"critical": 4, "urgent": 2, "routine": 1},
+        "queue_limits": {"critical": 8, "urgent": 4, "routine": 1},
+        "max_wait": {"critical": 5.0, "urgent": 5.0, "routine": 0.05},
+    }
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+def test_class_limit_queues_lower_classes_but_not_critical():
+    async def scenario():
+        admission = controller()
+        async with admission.admit("routine"):
+            # A free global slot is not enough: routine is at its own limit and times out.
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with admission.admit("routine"):
+                    pass
+            assert rejected.value.reason == "queue timeout"
+            async with admission.admit("critical"):
+                assert admission.snapshot()["running"] == 2
+        return admission.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["running"] == 0
+    assert snapshot["classes"]["routine"]["admitted"] == 1
+    assert snapshot["classes"]["routine"]["rejected"] == 1
+    assert snapshot["classes"]["routine"]["queued"] == 0
+
+
+def test_queue_full_rejects_immediately_with_retry_after():
+    async def scenario():
+        admission = controller(max_wait={"critical": 5.0, "urgent": 5.0, "routine": 5.0})
+        release = asyncio.Event()
+
+        async def hold(level):
+            async with admission.admit(level):
+                await release.wait()
+
+        holders = [asyncio.create_task(hold("routine")) for _ in range(2)]  # one running, one queued
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.admit("routine"):
+                pass
+        release.set()
+        await asyncio.gather(*holders)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.reason == "queue full"
+    # One request queued ahead, a 30 s service-time estimate and 4 slots: ceil(30 * 2 / 4).
+    assert rejected.retry_after == 15
+
+
+def test_waiters_are_admitted_by_urgency():
+    async def scenario():
+        admission = controller(max_concurrency=1, class_limits={"critical": 1, "urgent": 1, "routine": 1})
+        order = []
+
+        async def run(level):
+            async with admission.admit(level):
+                order.append(level)
+
+        async with admission.admit("routine"):
+            tasks = [asyncio.create_task(run(level)) for level in ("urgent", "critical")]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["critical", "urgent"]
+
+
+def test_retry_after_without_slots_does_not_divide_by_zero():
+    async def scenario():
+        admission = controller(max_concurrency=0, queue_limits={"critical": 0, "urgent": 0, "routine": 0})
+        async with admission.admit("critical"):
+            pass
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(scenario())
+    assert rejected.value.retry_after == 30
@@ -0,0 +1,50 @@
+# tests/test_api.py
+import fastapi.routing
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+PATIENT = {"patient_data": {
+    "Name": "A", "age": 30, "weight": 70, "gender": "female", "blood_group": "O+",
+    "symptoms": "itchy rash", "duration": "3 days",
+    "vitals": {"temperature": "37.0 C", "bp": "120/80", "pulse": "80", "spo2": "98"},
+}}
+
+
+class FakeGraph:
+    def invoke(self, state, config=None):
+        return {**state, "structured_input": {"missing_information": ["Is it spreading?", "Any new soaps?"]}}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "graph", FakeGraph())
+
+    # Hot endpoints return FastJSONResponse themselves, so FastAPI must not re-encode their payloads.
+    def no_encoding(*args, **kwargs):
+        raise AssertionError("jsonable_encoder called")
+
+    monkeypatch.setattr(fastapi.routing, "jsonable_encoder", no_encoding)
+    return TestClient(main.app)
+
+
+def test_start_and_continue(client):
+    started = client.post("/diagnose/start", json=PATIENT).json()
+    assert started["pending_question"] == "Is it spreading?"
+    assert started["total_questions"] == 2
+
+    conversation_id = started["conversation_id"]
+    second = client.post("/diagnose/continue", params={"conversation_id": conversation_id}, json={"answer": "yes"})
+    assert second.json() == {"conversation_id": conversation_id, "pending_question": "Any new soaps?", "remaining": 1}
+    done = client.post("/diagnose/continue", params={"conversation_id": conversation_id}, json={"answer": "no"})
+    assert done.json() == {"done": True, "final_analysis": {"answers": ["yes", "no"]}}
+
+
+def test_continue_unknown_conversation(client):
+    response = client.post("/diagnose/continue", params={"conversation_id": "missing"}, json={"answer": "yes"})
+    assert response.json() == {"error": "Invalid conversation_id"}
+
+
+def test_metrics(client):
+    assert set(client.get("/metrics").json()) == {"interview_loop", "node_cache", "admission"}
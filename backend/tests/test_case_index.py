@@ -0,0 +1,127 @@
+# tests/test_case_index.py
+import os
+
+from utils.case_index import CaseIndex, case_features, minhash
+
+
+def make_case(symptoms, age=40, gender="female", condition="Measles"):
+    return {
+        "raw_input": {"age": age, "gender": gender},
+        "structured_input": {"symptoms": symptoms, "vital_flags": {"fever": True}},
+        "final_analysis": {"status": "complete", "analysis": {"probable_diagnosis": {"condition": condition}}},
+    }
+
+
+CASES = [
+    make_case(["fever", "rash", "cough"], condition="Measles"),
+    make_case(["chest pain", "dyspnea"], age=65, gender="male", condition="Angina"),
+    make_case(["headache", "nausea", "photophobia"], age=25, condition="Migraine"),
+]
+
+
+def query(index, case, threshold=0.9):
+    return index.query(case["structured_input"], case["raw_input"], threshold=threshold)
+
+
+def test_minhash_is_deterministic_and_tracks_jaccard():
+    a = case_features(CASES[0]["structured_input"], CASES[0]["raw_input"])
+    assert (minhash(a) == minhash(set(a))).all()
+    assert (minhash(a) == minhash(a | {"symptom:itch"})).mean() < 1.0
+    assert (minhash(a) == minhash({"symptom:unrelated"})).mean() < 0.2
+
+
+def test_round_trip_through_save_and_reload(tmp_path):
+    index = CaseIndex(directory=str(tmp_path))
+    index.add_many(CASES)
+
+    reopened = CaseIndex(directory=str(tmp_path))
+    assert len(reopened) == len(CASES)
+    for case_id, case in enumerate(CASES):
+        match = query(reopened, case)
+        assert match["case_id"] == case_id
+        assert match["similarity"] == 1.0
+        assert match["final_analysis"] == case["final_analysis"]
+    assert query(reopened, make_case(["back pain"], age=80, gender="male")) is None
+
+
+def test_pending_and_merged_segments_keep_case_ids(tmp_path):
+    index = CaseIndex(directory=str(tmp_path), save_every=2)
+    cases = CASES + [make_case([f"symptom {i}", f"other {i}"], age=i, condition=f"C{i}") for i in range(20)]
+    for case in cases:
+        index.add(case["structured_input"], case["raw_input"], case["final_analysis"])
+    # The last add may still be pending or being flushed in the background.
+    assert query(index, cases[-1])["final_analysis"] == cases[-1]["final_analysis"]
+    index.save()
+
+    reopened = CaseIndex(directory=str(tmp_path))
+    assert len(reopened) == len(cases)
+    for case_id, case in enumerate(cases):
+        assert query(reopened, case)["case_id"] == case_id
+
+
+def test_retired_segment_files_are_removed(tmp_path, monkeypatch):
+    index = CaseIndex(directory=str(tmp_path), save_every=1)
+    for case in CASES:
+        index.add_many([case])
+    segment_files = {name for name in os.listdir(tmp_path) if name.startswith("segment-")}
+    assert segment_files == {s.name + suffix for s in index._segments for suffix in (".keys.npy", ".ids.npy")}
+
+    # A file that cannot be deleted yet (still mapped, on Windows) is retried on the next load.
+    def refuse(path):
+        raise PermissionError(path)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "remove", refuse)
+        index.add_many([make_case(["itch"])])
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("segment-")]) > 2 * len(index._segments)
+
+    reopened = CaseIndex(directory=str(tmp_path))
+    assert {name for name in os.listdir(tmp_path) if name.startswith("segment-")} == {
+        s.name + suffix for s in reopened._segments for suffix in (".keys.npy", ".ids.npy")}
+    for case_id, case in enumerate(CASES):
+        assert query(reopened, case)["case_id"] == case_id
+
+
+def test_reload_ignores_data_past_the_last_commit(tmp_path):
+    index = CaseIndex(directory=str(tmp_path))
+    index.add_many(CASES[:2])
+    # Simulate a flush that crashed after appending but before writing the manifest.
+    for name in ("cases.jsonl", "signatures.u32", "offsets.i64"):
+        with open(os.path.join(tmp_path, name), "ab") as f:
+            f.write(b"\x00" * 13)
+
+    reopened = CaseIndex(directory=str(tmp_path))
+    assert len(reopened) == 2
+    reopened.add_many(CASES[2:])
+    assert query(CaseIndex(directory=str(tmp_path)), CASES[2])["final_analysis"] == CASES[2]["final_analysis"]
+
+
+def test_cases_without_symptoms_are_not_indexed():
+    index = CaseIndex()
+    demographics_only = [make_case([], condition="A"), make_case(None, condition="B")]
+    for case in demographics_only:
+        assert index.add(case["structured_input"], case["raw_input"], case["final_analysis"]) is None
+        assert query(index, case) is None
+    failed_parse = {"raw_llm_output": "...", "parsing_error": "Expecting value"}
+    assert index.add(failed_parse, {"age": 40, "gender": "female"}, CASES[0]["final_analysis"]) is None
+    assert len(index) == 0
+
+    index.add_many(CASES + demographics_only)
+    assert len(index) == len(CASES)
+    assert query(index, demographics_only[0]) is None
+
+
+def test_symptoms_given_as_a_string():
+    index = CaseIndex()
+    case = make_case("fever and rash")
+    index.add(case["structured_input"], case["raw_input"], case["final_analysis"])
+    assert query(index, case)["case_id"] == 0
+    assert query(index, make_case("cough")) is None
+
+
+def test_in_memory_index():
+    index = CaseIndex()
+    for case in CASES:
+        index.add(case["structured_input"], case["raw_input"], case["final_analysis"])
+    index.save()  # no-op without a directory
+    assert query(index, CASES[1])["case_id"] == 1
@@ -0,0 +1,68 @@
+# tests/test_interview_socket.py
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from test_api import PATIENT
+
+
+class SlowGraph:
+    """Streams like the real graph, but holds the run open until `release` is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def stream(self, state, config=None, stream_mode=None):
+        yield "updates", {"intake_node": {}}
+        self.release.wait(5)
+        yield "values", {**state, "structured_input": {"missing_information": ["Is it spreading?"]}}
+
+
+@pytest.fixture
+def slow_graph(monkeypatch):
+    graph = SlowGraph()
+    monkeypatch.setattr(main, "graph", graph)
+    monkeypatch.setattr(main, "WS_HEARTBEAT_INTERVAL", 0.1)
+    monkeypatch.setattr(main, "WS_HEARTBEAT_TIMEOUT", 0.2)
+    yield graph
+    graph.release.set()
+
+
+def start(websocket):
+    websocket.send_json({"type": "start", "patient_data": PATIENT["patient_data"]})
+    accepted = websocket.receive_json()
+    assert accepted["type"] == "accepted"
+    assert websocket.receive_json() == {"type": "progress", "node": "intake_node"}
+    return accepted["conversation_id"]
+
+
+def test_messages_are_handled_while_the_graph_runs(slow_graph):
+    with TestClient(main.app).websocket_connect("/diagnose/ws") as websocket:
+        conversation_id = start(websocket)
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json() == {"type": "pong"}
+        websocket.send_json({"type": "start", "patient_data": PATIENT["patient_data"]})
+        assert websocket.receive_json() == {"type": "error", "detail": "A diagnosis is already running"}
+
+        # Answer the server's heartbeat pings until the run finishes.
+        slow_graph.release.set()
+        message = websocket.receive_json()
+        while message["type"] == "ping":
+            websocket.send_json({"type": "pong"})
+            message = websocket.receive_json()
+        assert message["type"] == "session" and message["conversation_id"] == conversation_id
+        question = websocket.receive_json()
+        assert question["type"] == "question" and question["question"] == "Is it spreading?"
+
+
+def test_missing_pong_closes_the_socket_during_a_run(slow_graph):
+    with TestClient(main.app).websocket_connect("/diagnose/ws") as websocket:
+        start(websocket)
+        assert websocket.receive_json() == {"type": "ping"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+        assert closed.value.code == 1001
+        slow_graph.release.set()
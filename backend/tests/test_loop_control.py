@@ -0,0 +1,21 @@
+# tests/test_loop_control.py
+import pytest
+
+from utils.loop_control import extract_confidence
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ({"confidence_score": "85%"}, 85.0),
+    ({"analysis": {"probable_diagnosis": {"confidence_score": 72.5}}}, 72.5),
+    ({"analysis": {"probable_diagnosis": {"confidence_score": "about 60 percent"}}}, 60.0),
+    ({"analysis": {"probable_diagnosis": {}}}, None),
+    ({}, None),
+])
+def test_extract_confidence(entry, expected):
+    assert extract_confidence(entry) == expected
+
+
+@pytest.mark.parametrize("analysis", [None, "unparseable", ["a", "b"], {"probable_diagnosis": None},
+                                      {"probable_diagnosis": "Measles"}])
+def test_extract_confidence_tolerates_malformed_analysis(analysis):
+    assert extract_confidence({"analysis": analysis}) is None
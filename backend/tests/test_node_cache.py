@@ -0,0 +1,71 @@
+# tests/test_node_cache.py
+from utils.node_cache import NodeCache, component_version, fingerprint_state, memoize_node
+
+
+def counting_node(cache, version="", cacheable=None):
+    calls = []
+
+    @memoize_node(reads=["raw_input.symptoms"], version=version, cacheable=cacheable, cache=cache)
+    def node(state):
+        calls.append(state)
+        return {"result": {"symptoms": state["raw_input"]["symptoms"]}}
+
+    return node, calls
+
+
+def test_hit_and_miss():
+    cache = NodeCache()
+    node, calls = counting_node(cache)
+    state = {"raw_input": {"symptoms": "rash", "Name": "A"}}
+
+    assert node(state) == {"result": {"symptoms": "rash"}}
+    # Keys the node does not read do not affect the cache key.
+    assert node({"raw_input": {"symptoms": "rash", "Name": "B"}}) == {"result": {"symptoms": "rash"}}
+    assert len(calls) == 1
+    node({"raw_input": {"symptoms": "cough"}})
+    assert len(calls) == 2
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 2}
+
+
+def test_hits_return_copies():
+    cache = NodeCache()
+    node, _ = counting_node(cache)
+    state = {"raw_input": {"symptoms": "rash"}}
+    node(state)["result"]["symptoms"] = "mutated"
+    assert node(state) == {"result": {"symptoms": "rash"}}
+
+
+def test_version_change_invalidates():
+    cache = NodeCache()
+    state = {"raw_input": {"symptoms": "rash"}}
+    old_node, old_calls = counting_node(cache, version="v1")
+    new_node, new_calls = counting_node(cache, version="v2")
+    old_node(state)
+    new_node(state)
+    assert len(old_calls) == 1 and len(new_calls) == 1
+    assert component_version(version="v1") != component_version(version="v2")
+
+
+def test_non_cacheable_deltas_are_not_stored():
+    cache = NodeCache()
+    node, calls = counting_node(cache, cacheable=lambda delta: False)
+    state = {"raw_input": {"symptoms": "rash"}}
+    node(state)
+    node(state)
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_absent_key_differs_from_none():
+    assert fingerprint_state({}, ["raw_input.symptoms"]) != fingerprint_state(
+        {"raw_input": {"symptoms": None}}, ["raw_input.symptoms"]
+    )
+
+
+def test_lru_eviction():
+    cache = NodeCache(max_entries=2)
+    node, calls = counting_node(cache)
+    for symptoms in ("a", "b", "c", "a"):
+        node({"raw_input": {"symptoms": symptoms}})
+    assert len(calls) == 4
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,73 @@
+# tests/test_report_template.py
+from utils.report_template import render_report_markdown
+
+RAW_INPUT = {"Name": "Test Patient", "age": 40, "symptoms": "fever, rash"}
+
+
+def section(report: str, heading: str) -> list:
+    lines = report.split("\n")
+    start = lines.index(heading) + 1
+    end = next((i for i in range(start, len(lines)) if lines[i].startswith("#")), len(lines))
+    return [line for line in lines[start:end] if line]
+
+
+def complete_analysis(**analysis_fields):
+    analysis = {
+        "probable_diagnosis": {
+            "condition": "Measles",
+            "confidence_score": "80",
+            "reasoning": "Typical presentation.",
+            "evidence": ["fever", "rash"],
+            "urgency": "Medium",
+        },
+        "differential_diagnosis": [{"condition": "Rubella", "reasoning": "Similar rash."}],
+        "recommended_tests": ["Measles IgM"],
+        "suggested_medications": ["Paracetamol"],
+    }
+    analysis.update(analysis_fields)
+    return {"status": "complete", "analysis": analysis}
+
+
+def test_renders_complete_analysis():
+    report = render_report_markdown(RAW_INPUT, complete_analysis())
+    assert "- **Condition:** Measles" in report
+    assert "- **Confidence:** 80%" in report
+    assert "    - fever" in report
+    assert section(report, "## Differential Diagnoses") == ["- **Rubella**: Similar rash."]
+
+
+def test_null_list_fields_render_as_empty():
+    report = render_report_markdown(RAW_INPUT, complete_analysis(
+        differential_diagnosis=None, recommended_tests=None, suggested_medications=None
+    ))
+    assert section(report, "## Differential Diagnoses") == ["- None recorded."]
+    assert section(report, "### Suggested Diagnostic Tests") == ["- None recorded."]
+    assert section(report, "### Suggested Medications / Treatments")[0] == "- None recorded."
+
+
+def test_string_fields_render_as_one_bullet():
+    analysis = complete_analysis(recommended_tests="CBC", differential_diagnosis="Rubella")
+    analysis["analysis"]["probable_diagnosis"]["evidence"] = "fever and rash"
+    report = render_report_markdown(RAW_INPUT, analysis)
+    assert "    - fever and rash" in report
+    assert "    - f" not in report.split("\n")
+    assert section(report, "### Suggested Diagnostic Tests") == ["- CBC"]
+    assert section(report, "## Differential Diagnoses") == ["- Rubella"]
+
+
+def test_missing_fields_render_placeholders():
+    analysis = complete_analysis()
+    del analysis["analysis"]["differential_diagnosis"]
+    del analysis["analysis"]["recommended_tests"]
+    del analysis["analysis"]["probable_diagnosis"]["evidence"]
+    report = render_report_markdown(RAW_INPUT, analysis)
+    assert "    - No supporting evidence recorded." in report
+    assert section(report, "## Differential Diagnoses") == ["- None recorded."]
+
+
+def test_wrongly_typed_analysis_is_treated_as_incomplete():
+    for final_analysis in ({"status": "complete", "analysis": "n/a"},
+                           {"status": "complete", "analysis": {"probable_diagnosis": ["Measles"]}},
+                           None):
+        report = render_report_markdown(RAW_INPUT, final_analysis)
+        assert "- Analysis is incomplete." in report
@@ -0,0 +1,77 @@
+# tests/test_reports.py
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils.artifact_store import ArtifactStore
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def stored_report(tmp_path, monkeypatch):
+    store = ArtifactStore(root=str(tmp_path), max_bytes=10 * len(PDF))
+    monkeypatch.setattr(main, "report_store", store)
+    key = store.key_for(PDF)
+    path = store.put(key, PDF)
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return TestClient(main.app), key
+
+
+def test_last_modified_is_stable_across_hits(stored_report):
+    client, key = stored_report
+    first = client.get(f"/reports/{key}")
+    second = client.get(f"/reports/{key}")
+    assert first.status_code == second.status_code == 200
+    assert first.content == PDF
+    assert first.headers["etag"] == f'"{key}"'
+    assert first.headers["last-modified"] == second.headers["last-modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+
+
+def test_if_none_match(stored_report):
+    client, key = stored_report
+    assert client.get(f"/reports/{key}", headers={"If-None-Match": f'W/"{key}"'}).status_code == 304
+    assert client.get(f"/reports/{key}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_if_modified_since(stored_report):
+    client, key = stored_report
+    last_modified = client.get(f"/reports/{key}").headers["last-modified"]
+    assert client.get(f"/reports/{key}", headers={"If-Modified-Since": last_modified}).status_code == 304
+    earlier = "Mon, 13 Nov 2023 00:00:00 GMT"
+    assert client.get(f"/reports/{key}", headers={"If-Modified-Since": earlier}).status_code == 200
+    assert client.get(f"/reports/{key}", headers={"If-Modified-Since": "garbage"}).status_code == 200
+
+
+def test_range_and_if_range(stored_report):
+    client, key = stored_report
+    last_modified = client.get(f"/reports/{key}").headers["last-modified"]
+    for validator in (f'"{key}"', last_modified):
+        response = client.get(f"/reports/{key}", headers={"Range": "bytes=0-99", "If-Range": validator})
+        assert response.status_code == 206
+        assert response.content == PDF[:100]
+    stale = client.get(f"/reports/{key}", headers={"Range": "bytes=0-99", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.content == PDF
+
+
+def test_unknown_report(stored_report):
+    client, _ = stored_report
+    assert client.get(f"/reports/{'0' * 64}").status_code == 404
+    assert client.get("/reports/not-a-key").status_code == 404
+
+
+def test_eviction_uses_access_time_not_mtime(tmp_path):
+    blobs = [PDF + bytes([i]) for i in range(3)]
+    store = ArtifactStore(root=str(tmp_path), max_bytes=2 * len(blobs[0]))
+    old, new, third = (store.key_for(blob) for blob in blobs)
+    for i, key in enumerate((old, new)):
+        store.put(key, blobs[i])
+        os.utime(store.path_for(key), (1_700_000_000 + i, 1_700_000_000 + i))
+    assert store.get(old) is not None  # now the most recently used
+    assert os.stat(store.path_for(old)).st_mtime == 1_700_000_000
+
+    store.put(third, blobs[2])
+    assert store.get(new) is None
+    assert store.get(old) is not None
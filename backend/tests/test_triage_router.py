@@ -0,0 +1,36 @@
+# tests/test_triage_router.py
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import langgraph_logic
+from utils.node_cache import node_cache
+
+
+@pytest.fixture
+def triage_reply(monkeypatch):
+    node_cache.clear()
+
+    def set_reply(content):
+        monkeypatch.setattr(langgraph_logic, "triage_llm", RunnableLambda(lambda _: AIMessage(content=content)))
+
+    yield set_reply
+    node_cache.clear()
+
+
+@pytest.mark.parametrize("content", ['{"department": "neurology"}', "not json", '["cardiology"]'])
+def test_invalid_routes_fall_back_uncached(triage_reply, content):
+    triage_reply(content)
+    delta = langgraph_logic.triage_router_node({"raw_input": {"symptoms": "headache"}})
+    assert delta["diagnosis_path"] == "general_medicine"
+    assert delta["routing_fallback"] is True
+    assert node_cache.stats()["entries"] == 0
+
+
+def test_valid_route_is_cached(triage_reply):
+    triage_reply('{"department": "dermatology"}')
+    state = {"raw_input": {"symptoms": "itchy rash"}}
+    assert langgraph_logic.triage_router_node(state)["diagnosis_path"] == "dermatology"
+    triage_reply("not json")
+    assert langgraph_logic.triage_router_node(state)["diagnosis_path"] == "dermatology"
+    assert node_cache.stats()["hits"] == 1
@@ -0,0 +1,85 @@
+# tests/test_vitals.py
+import math
+
+import pytest
+
+from utils.vitals import compute_vital_flags_batch, normalize_vitals, parse_bp, parse_spo2, parse_temperature, precompute_intake
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("38.2°C", 38.2),
+    ("38,2 c", 38.2),
+    ("101.3 F", 38.5),
+    ("101.3°F", 38.5),
+    ("99.5 fahrenheit", 37.5),
+    ("37.5", 37.5),
+    ("101.3", 38.5),  # no unit and too high for °C
+    (38.5, 38.5),
+    ("Temp 38.5 C", 38.5),
+    ("temperature of 39", 39.0),
+])
+def test_parse_temperature(value, expected):
+    assert parse_temperature(value) == pytest.approx(expected, abs=0.05)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("92", 92.0),
+    ("92%", 92.0),
+    ("0.97", 97.0),
+    ("SpO2 92", 92.0),
+    ("SpO2: 88 %", 88.0),
+    ("O2 sat 95%", 95.0),
+])
+def test_parse_spo2(value, expected):
+    assert parse_spo2(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120/80", (120.0, 80.0)),
+    ("150 / 95 mmHg", (150.0, 95.0)),
+    ("BP 135/85", (135.0, 85.0)),
+])
+def test_parse_bp(value, expected):
+    assert parse_bp(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "unknown", "SpO2"])
+def test_unreadable_values_are_nan(value):
+    assert math.isnan(parse_spo2(value))
+    assert math.isnan(parse_temperature(value))
+    assert all(math.isnan(v) for v in parse_bp(value))
+
+
+def test_labelled_values_normalize():
+    assert normalize_vitals({"temperature": "T 100.4 F", "bp": "BP 120/80", "pulse": "HR 88 bpm", "spo2": "SpO2 97"}) == {
+        "temperature_c": 38.0, "systolic": 120.0, "diastolic": 80.0, "pulse": 88.0, "spo2": 97.0,
+    }
+
+
+@pytest.mark.parametrize("vitals, flag, expected", [
+    ({"temperature": "38.0"}, "fever", True),
+    ({"temperature": "37.9"}, "fever", False),
+    ({"bp": "140/80"}, "hypertension", True),
+    ({"bp": "130/90"}, "hypertension", True),
+    ({"bp": "139/89"}, "hypertension", False),
+    ({"pulse": "101"}, "tachycardia", True),
+    ({"pulse": "100"}, "tachycardia", False),
+    ({"spo2": "93"}, "hypoxia", True),
+    ({"spo2": "94"}, "hypoxia", False),
+    ({"spo2": "SpO2 92"}, "hypoxia", True),
+    ({"spo2": "SpO2 97"}, "hypoxia", False),
+])
+def test_flag_thresholds(vitals, flag, expected):
+    assert compute_vital_flags_batch([vitals])[0][flag] is expected
+
+
+def test_missing_values_raise_no_flags():
+    assert compute_vital_flags_batch([None, {}]) == [
+        {"fever": False, "hypertension": False, "tachycardia": False, "hypoxia": False},
+    ] * 2
+
+
+def test_precompute_intake_lists_missing_fields():
+    intake = precompute_intake({"age": 30, "gender": " ", "symptoms": "cough", "vitals": {"bp": "120/80", "spo2": "n/a"}})
+    assert intake["missing_fields"] == ["gender", "duration", "temperature", "pulse", "spo2"]
+    assert len(intake["missing_questions"]) == 5
@@ -0,0 +1,215 @@
+# utils/admission.py
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from .vitals import compute_vital_flags_batch, normalize_vitals
+
+# Highest priority first.
+URGENCY_LEVELS = ("critical", "urgent", "routine")
+
+CRITICAL_SYMPTOMS = re.compile(
+    r"chest pain|shortness of breath|can'?t breathe|difficulty breathing|unconscious|fainted|seizure|"
+    r"stroke|slurred speech|severe bleeding|coughing (up )?blood|suicid",
+    re.IGNORECASE
+)
+URGENT_SYMPTOMS = re.compile(
+    r"high fever|vomiting|severe|palpitations|dizz|confus|dehydrat|blood in",
+    re.IGNORECASE
+)
+# A negation cue negates symptom mentions after it up to the end of its clause ("no fever but chest pain").
+_NEGATION = re.compile(r"\b(?:no|not|denies|denied|denying|without|negative for)\b", re.IGNORECASE)
+_CLAUSE_BREAK = re.compile(r"[.,;:!?\n]|\bbut\b|\bhowever\b", re.IGNORECASE)
+
+
+def _mentions(pattern: re.Pattern, text: str) -> bool:
+    """True when `pattern` matches somewhere in `text` that is not negated, e.g. not in "denies chest pain"."""
+    for clause in _CLAUSE_BREAK.split(text or ""):
+        for match in pattern.finditer(clause):
+            if not _NEGATION.search(clause, 0, match.start()):
+                return True
+    return False
+
+
+def score_urgency(vitals: Dict[str, Any], symptoms: str) -> Dict[str, Any]:
+    """
+    Cheap, rule-based urgency triage of an incoming request, from vitals and symptom text only.
+    Returns {"level": critical|urgent|routine, "reasons": [...]}.
+    """
+    values = normalize_vitals(vitals)
+    flags = compute_vital_flags_batch([vitals])[0]
+    reasons: List[str] = []
+
+    if flags["hypoxia"]:
+        reasons.append("hypoxia")
+    if values["spo2"] is not None and values["spo2"] < 90:
+        reasons.append("spo2<90")
+    if values["temperature_c"] is not None and values["temperature_c"] >= 40.0:
+        reasons.append("hyperpyrexia")
+    if values["systolic"] is not None and values["systolic"] >= 180:
+        reasons.append("hypertensive crisis")
+    if _mentions(CRITICAL_SYMPTOMS, symptoms):
+        reasons.append("critical symptom")
+    if reasons:
+        return {"level": "critical", "reasons": reasons}
+
+    reasons = [flag for flag in ("fever", "hypertension", "tachycardia") if flags[flag]]
+    if _mentions(URGENT_SYMPTOMS, symptoms):
+        reasons.append("urgent symptom")
+    return {"level": "urgent" if reasons else "routine", "reasons": reasons}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; `retry_after` is a hint in whole seconds."""
+
+    def __init__(self, level: str, retry_after: int, reason: str):
+        super().__init__(f"{level} request rejected: {reason}")
+        self.level = level
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def _env_limits(name: str, defaults: Dict[str, int]) -> Dict[str, int]:
+    """Reads e.g. ADMISSION_CLASS_LIMITS="critical=8,urgent=6,routine=3"."""
+    limits = dict(defaults)
+    for item in filter(None, os.getenv(name, "").split(",")):
+        level, _, value = item.partition("=")
+        limits[level.strip()] = int(value)
+    return limits
+
+
+class AdmissionController:
+    """
+    Admits graph runs by urgency.
+
+    At most `max_concurrency` runs execute at once, and each class has its own
+    concurrency limit, so lower classes can never occupy the slots kept for
+    critical cases. Waiting requests sit in one priority heap (class, then
+    arrival order). When a class's queue is full, or a request waits longer
+    than its class allows, it is rejected with a retry-after hint. This is
+    how low-urgency work is shed under overload.
+    """
+
+    def __init__(self, max_concurrency: int, class_limits: Dict[str, int],
+                 queue_limits: Dict[str, int], max_wait: Dict[str, float]):
+        self.max_concurrency = max_concurrency
+        self.class_limits = class_limits
+        self.queue_limits = queue_limits
+        self.max_wait = max_wait
+        self._running = {level: 0 for level in URGENCY_LEVELS}
+        self._queued = {level: 0 for level in URGENCY_LEVELS}
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._service_time = 30.0  # EWMA of run duration in seconds, seeded with a typical session.
+        self._admitted = {level: 0 for level in URGENCY_LEVELS}
+        self._rejected = {level: 0 for level in URGENCY_LEVELS}
+        self._waits = {level: deque(maxlen=1000) for level in URGENCY_LEVELS}
+
+    def _has_capacity(self, level: str) -> bool:
+        return (sum(self._running.values()) < self.max_concurrency
+                and self._running[level] < self.class_limits[level])
+
+    def _retry_after(self, level: str) -> int:
+        ahead = sum(self._queued[lvl] for lvl in URGENCY_LEVELS[:URGENCY_LEVELS.index(level) + 1])
+        return max(1, math.ceil(self._service_time * (ahead + 1) / max(1, self.max_concurrency)))
+
+    def _reject(self, level: str, reason: str) -> AdmissionRejected:
+        self._rejected[level] += 1
+        return AdmissionRejected(level, self._retry_after(level), reason)
+
+    def _dispatch(self) -> None:
+        """Hands free slots to the highest-priority waiters whose class still has capacity."""
+        skipped = []
+        while self._waiters and sum(self._running.values()) < self.max_concurrency:
+            entry = heapq.heappop(self._waiters)
+            _, _, level, future = entry
+            if future.done():
+                continue
+            if self._running[level] >= self.class_limits[level]:
+                skipped.append(entry)
+                continue
+            self._queued[level] -= 1
+            self._running[level] += 1
+            future.set_result(True)
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+    @asynccontextmanager
+    async def admit(self, level: str):
+        level = level if level in URGENCY_LEVELS else "routine"
+        enqueued_at = time.perf_counter()
+
+        higher_waiting = any(self._queued[lvl] for lvl in URGENCY_LEVELS[:URGENCY_LEVELS.index(level) + 1])
+        if self._has_capacity(level) and not higher_waiting:
+            self._running[level] += 1
+        else:
+            if self._queued[level] >= self.queue_limits[level]:
+                raise self._reject(level, "queue full")
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (URGENCY_LEVELS.index(level), next(self._sequence), level, future))
+            self._queued[level] += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(future), self.max_wait[level])
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done() and not future.cancelled():
+                    # Admitted in the same tick the wait expired: give the slot back.
+                    self._running[level] -= 1
+                    self._dispatch()
+                else:
+                    future.cancel()
+                    self._queued[level] -= 1
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                raise self._reject(level, "queue timeout")
+
+        self._admitted[level] += 1
+        self._waits[level].append(time.perf_counter() - enqueued_at)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.perf_counter() - started)
+            self._running[level] -= 1
+            self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        classes = {}
+        for level in URGENCY_LEVELS:
+            waits = sorted(self._waits[level])
+            classes[level] = {
+                "running": self._running[level],
+                "queued": self._queued[level],
+                "admitted": self._admitted[level],
+                "rejected": self._rejected[level],
+                "concurrency_limit": self.class_limits[level],
+                "queue_limit": self.queue_limits[level],
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95_s": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": sum(self._running.values()),
+            "service_time_ewma_s": round(self._service_time, 3),
+            "classes": classes,
+        }
+
+
+_max_concurrency = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+admission_controller = AdmissionController(
+    max_concurrency=_max_concurrency,
+    class_limits=_env_limits("ADMISSION_CLASS_LIMITS", {
+        "critical": _max_concurrency,
+        "urgent": max(1, _max_concurrency * 3 // 4),
+        "routine": max(1, _max_concurrency // 2),
+    }),
+    queue_limits=_env_limits("ADMISSION_QUEUE_LIMITS", {"critical": 256, "urgent": 64, "routine": 16}),
+    max_wait={"critical": 600.0, "urgent": 120.0, "routine": 30.0},
+)
@@ -0,0 +1,110 @@
+# utils/artifact_store.py
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Optional, Union
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArtifactStore:
+    """
+    A content-addressed file store for generated reports.
+
+    Artifacts live under sharded directories (`ab/cd/abcd....pdf`) so no single
+    directory grows unbounded. When the total size exceeds `max_bytes`, the least
+    recently used artifacts are evicted. Recency is kept in the access time, which
+    `get` sets explicitly, so the mtime (served as Last-Modified) never changes.
+    """
+
+    def __init__(self, root: str, max_bytes: int, suffix: str = ".pdf"):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def key_for(content: Union[str, bytes]) -> str:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def is_valid_key(key: str) -> bool:
+        return bool(_KEY_PATTERN.match(key))
+
+    def path_for(self, key: str) -> str:
+        if not self.is_valid_key(key):
+            raise ValueError(f"Invalid artifact key: {key!r}")
+        return os.path.join(self.root, key[:2], key[2:4], key + self.suffix)
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the artifact's path if it is stored, marking it as recently used."""
+        if not self.is_valid_key(key):
+            return None
+        path = self.path_for(key)
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """Atomically stores `data` under `key`, then evicts old artifacts if over budget."""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            existed = os.path.exists(path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._total_bytes is not None and not existed:
+                self._total_bytes += len(data)
+            self._evict_locked(keep=path)
+        return path
+
+    def _scan(self):
+        for dir_path, _, file_names in os.walk(self.root):
+            for name in file_names:
+                if name.endswith(self.suffix):
+                    full_path = os.path.join(dir_path, name)
+                    try:
+                        stat = os.stat(full_path)
+                    except FileNotFoundError:
+                        continue
+                    yield full_path, stat.st_size, stat.st_atime
+
+    def _evict_locked(self, keep: str) -> None:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._scan())
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        for path, size, _ in sorted(self._scan(), key=lambda entry: entry[2]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except FileNotFoundError:
+                continue
+
+
+report_store = ArtifactStore(
+    root=os.getenv("REPORT_STORE_DIR", "report_artifacts"),
+    max_bytes=int(os.getenv("REPORT_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+)
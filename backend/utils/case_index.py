@@ -0,0 +1,365 @@
+# utils/case_index.py
+
+import atexit
+import hashlib
+import mmap
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+
+from .report_template import parse_lab_summary
+from .serialization import dumps_bytes, loads
+
+NUM_PERM = 128
+# 16 bands of 8 rows: a 0.9-similar case shares a bucket with ~100% probability, a 0.5-similar one ~6%.
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard similarity above which a prior case is offered to the specialist.
+CASE_MATCH_THRESHOLD = float(os.getenv("CASE_MATCH_THRESHOLD", "0.9"))
+# Candidates must share this many buckets with the query before their signatures are compared.
+# A 0.9-similar case shares 2+ of 16 bands with probability >99.9%; most chance collisions share one.
+MIN_BAND_HITS = 2
+# A new segment is merged into the previous one until that one is this many times larger, which
+# keeps about log8(n / save_every) segments to search while rewriting each key a bounded number of times.
+SEGMENT_SIZE_RATIO = 8
+
+_rng = np.random.default_rng(20240917)
+# Multiply-shift hashing: h(x) = (a * x + b) >> 32 over uint64 with odd `a`.
+_PERM_A = _rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2 ** 63, size=ROWS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALT = np.arange(BANDS, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+
+def _symptoms(structured_input: Dict[str, Any]) -> List[str]:
+    symptoms = structured_input.get("symptoms") or []
+    if isinstance(symptoms, str):
+        symptoms = [symptoms]
+    return [str(s).strip().lower() for s in symptoms if str(s).strip()]
+
+
+def is_indexable(structured_input: Dict[str, Any]) -> bool:
+    """
+    Only cases whose intake parsed and named at least one symptom are indexed or looked up:
+    demographics and vital flags alone would match unrelated patients at similarity 1.0.
+    """
+    return "parsing_error" not in structured_input and bool(_symptoms(structured_input))
+
+
+def case_features(structured_input: Dict[str, Any], raw_input: Dict[str, Any]) -> Set[str]:
+    """The structured inputs a case is compared on: age band, sex, symptoms, vital flags and lab findings."""
+    features = set()
+    age = raw_input.get("age")
+    if isinstance(age, (int, float)):
+        features.add(f"age:{int(age) // 10 * 10}")
+    if raw_input.get("gender"):
+        features.add(f"gender:{str(raw_input['gender']).strip().lower()}")
+    for symptom in _symptoms(structured_input):
+        features.add(f"symptom:{symptom}")
+    for flag, raised in (structured_input.get("vital_flags") or {}).items():
+        if raised:
+            features.add(f"flag:{flag}")
+    for result in (structured_input.get("lab_results") or {}).values():
+        summary = result.get("summary") if isinstance(result, dict) else None
+        if isinstance(summary, str):
+            summary = parse_lab_summary(summary)
+        if isinstance(summary, dict):
+            for finding in summary.get("abnormal_findings") or []:
+                if isinstance(finding, dict):
+                    features.add(f"lab:{str(finding.get('parameter', '')).lower()}:{str(finding.get('interpretation', '')).lower()}")
+    return features
+
+
+def minhash(features: Set[str]) -> np.ndarray:
+    if not features:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    values = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=4).digest(), "little") for f in features),
+        dtype=np.uint64, count=len(features)
+    )
+    hashed = (_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) >> np.uint64(32)
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """(N, NUM_PERM) signatures -> (N, BANDS) LSH bucket keys. The band salt keeps keys of different bands apart."""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    return (rows * _BAND_MIX).sum(axis=2, dtype=np.uint64) ^ _BAND_SALT
+
+
+class _Segment(NamedTuple):
+    name: str
+    keys: np.ndarray  # sorted band keys of every case in the segment, all bands together
+    ids: np.ndarray   # case id of each key
+
+    @property
+    def cases(self) -> int:
+        return len(self.keys) // BANDS
+
+
+class CaseIndex:
+    """
+    Indexes completed analyses by a MinHash signature of their structured inputs.
+
+    Lookups use LSH banding: every band of a signature is a bucket key, and a case
+    is a candidate if it shares at least MIN_BAND_HITS buckets with the query.
+
+    On disk, payloads, signatures and payload end offsets are append-only files, and
+    bucket keys live in immutable segments: flat sorted key arrays, memory-mapped and
+    binary searched. Cases added since the last flush live in an in-memory bucket dict.
+    A flush writes one small segment and merges it into the previous ones while they
+    are of similar size (see SEGMENT_SIZE_RATIO), so there are O(log n) segments.
+    Flushes triggered by add() run on a background thread; queries only wait for the
+    final swap of the new arrays.
+    """
+
+    def __init__(self, directory: Optional[str] = None, save_every: int = 50):
+        self.directory = directory
+        self.save_every = save_every
+        self._lock = threading.Lock()        # guards the arrays below; held only briefly
+        self._save_lock = threading.Lock()   # one writer at a time
+        self._saving = False
+        self._count = 0
+        self._next_segment = 0
+        self._segments: List[_Segment] = []
+        self._signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._ends = np.empty(0, dtype=np.int64)
+        self._payloads: Optional[mmap.mmap] = None
+        self._pending_signatures: List[np.ndarray] = []
+        self._pending_payloads: List[bytes] = []
+        self._pending_buckets = defaultdict(list)
+        if directory and os.path.exists(self._path("manifest.json")):
+            self._load()
+
+    def __len__(self) -> int:
+        return self._count + len(self._pending_signatures)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open_segment(self, name: str) -> _Segment:
+        # np.asarray drops the np.memmap subclass, whose per-slice overhead dominates small lookups.
+        return _Segment(name, np.asarray(np.load(self._path(f"{name}.keys.npy"), mmap_mode="r")),
+                        np.asarray(np.load(self._path(f"{name}.ids.npy"), mmap_mode="r")))
+
+    def _write_segment(self, keys: np.ndarray, ids: np.ndarray) -> _Segment:
+        name = f"segment-{self._next_segment:08d}"
+        self._next_segment += 1
+        order = np.argsort(keys, kind="stable")
+        np.save(self._path(f"{name}.keys.npy"), keys[order])
+        np.save(self._path(f"{name}.ids.npy"), ids[order].astype(np.uint32))
+        return self._open_segment(name)
+
+    def _write_manifest(self, count: int, segments: List[_Segment]) -> None:
+        """The manifest is the commit point: data past `count` in the append-only files is ignored."""
+        tmp_path = self._path("manifest.json.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(dumps_bytes({"count": count, "segments": [s.name for s in segments],
+                                 "next_segment": self._next_segment}))
+        os.replace(tmp_path, self._path("manifest.json"))
+
+    def _open_views(self, count: int):
+        """Memory-maps the first `count` signatures, payload end offsets and the payload file."""
+        if not count:
+            return np.empty((0, NUM_PERM), dtype=np.uint32), np.empty(0, dtype=np.int64), None
+        signatures = np.asarray(np.memmap(self._path("signatures.u32"), dtype=np.uint32, mode="r",
+                                          shape=(count, NUM_PERM)))
+        ends = np.asarray(np.memmap(self._path("offsets.i64"), dtype=np.int64, mode="r", shape=(count,)))
+        with open(self._path("cases.jsonl"), "rb") as f:
+            payloads = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return signatures, ends, payloads
+
+    def _load(self) -> None:
+        with open(self._path("manifest.json"), "rb") as f:
+            manifest = loads(f.read())
+        self._count = manifest["count"]
+        self._next_segment = manifest["next_segment"]
+        self._segments = [self._open_segment(name) for name in manifest["segments"]]
+        self._remove_retired_segments()
+        # Drop anything a crashed flush appended after the last committed case.
+        ends = np.fromfile(self._path("offsets.i64"), dtype=np.int64, count=self._count) if self._count else []
+        for name, size in (("signatures.u32", self._count * NUM_PERM * 4), ("offsets.i64", self._count * 8),
+                           ("cases.jsonl", int(ends[-1]) if self._count else 0)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(size)
+        self._signatures, self._ends, self._payloads = self._open_views(self._count)
+
+    def _append_pending(self, signature: np.ndarray, payload: bytes) -> int:
+        case_id = len(self)
+        self._pending_signatures.append(signature)
+        self._pending_payloads.append(payload)
+        for key in band_keys(signature[None, :])[0]:
+            self._pending_buckets[int(key)].append(case_id)
+        return case_id
+
+    def add(self, structured_input: Dict[str, Any], raw_input: Dict[str, Any],
+            final_analysis: Dict[str, Any]) -> Optional[int]:
+        """Indexes a completed analysis and returns its case id, or None if the case is not indexable."""
+        if not is_indexable(structured_input):
+            return None
+        signature = minhash(case_features(structured_input, raw_input))
+        payload = dumps_bytes(final_analysis) + b"\n"
+        with self._lock:
+            case_id = self._append_pending(signature, payload)
+            start_save = (self.directory and not self._saving
+                          and len(self._pending_signatures) >= self.save_every)
+            if start_save:
+                self._saving = True
+        if start_save:
+            threading.Thread(target=self._background_save, name="case-index-save", daemon=True).start()
+        return case_id
+
+    def add_many(self, cases: List[Dict[str, Any]]) -> None:
+        """
+        Bulk-loads cases given as dicts with structured_input, raw_input and final_analysis.
+        Cases that are not indexable are skipped. With a directory, they are flushed to disk before returning.
+        """
+        prepared = [(minhash(case_features(case["structured_input"], case["raw_input"])),
+                     dumps_bytes(case["final_analysis"]) + b"\n")
+                    for case in cases if is_indexable(case["structured_input"])]
+        with self._lock:
+            for signature, payload in prepared:
+                self._append_pending(signature, payload)
+        self.save()
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        found = []
+        # One binary search per segment: bucket `key` spans [position of key, position of key + 1).
+        probes = np.concatenate([keys, keys + np.uint64(1)])
+        for segment in self._segments:
+            bounds = np.searchsorted(segment.keys, probes)
+            lo = bounds[:BANDS]
+            lengths = np.maximum(bounds[BANDS:] - lo, 0)
+            total = int(lengths.sum())
+            if total:
+                starts = np.repeat(lo - (np.cumsum(lengths) - lengths), lengths)
+                found.append(segment.ids[starts + np.arange(total)])
+        for key in keys:
+            pending = self._pending_buckets.get(int(key))
+            if pending:
+                found.append(np.asarray(pending, dtype=np.uint32))
+        if not found:
+            return np.empty(0, dtype=np.uint32)
+        candidates, hits = np.unique(np.concatenate(found), return_counts=True)
+        return candidates[hits >= MIN_BAND_HITS]
+
+    def _payload(self, case_id: int) -> Dict[str, Any]:
+        if case_id >= self._count:
+            return loads(self._pending_payloads[case_id - self._count])
+        start = int(self._ends[case_id - 1]) if case_id else 0
+        return loads(self._payloads[start:int(self._ends[case_id])])
+
+    def query(self, structured_input: Dict[str, Any], raw_input: Dict[str, Any],
+              threshold: float = CASE_MATCH_THRESHOLD) -> Optional[Dict[str, Any]]:
+        """Returns the most similar indexed case at or above `threshold`, or None."""
+        if not is_indexable(structured_input):
+            return None
+        signature = minhash(case_features(structured_input, raw_input))
+        keys = band_keys(signature[None, :])[0]
+        with self._lock:
+            candidates = self._candidates(keys)
+            if not len(candidates):
+                return None
+            is_stored = candidates < self._count
+            rows = np.empty((len(candidates), NUM_PERM), dtype=np.uint32)
+            rows[is_stored] = self._signatures[candidates[is_stored]]
+            for i in np.flatnonzero(~is_stored):
+                rows[i] = self._pending_signatures[int(candidates[i]) - self._count]
+            similarities = (rows == signature).mean(axis=1)
+            best = int(similarities.argmax())
+            if similarities[best] < threshold:
+                return None
+            case_id = int(candidates[best])
+            return {"case_id": case_id, "similarity": float(similarities[best]), "final_analysis": self._payload(case_id)}
+
+    def _background_save(self) -> None:
+        try:
+            self.save()
+        except Exception as e:
+            print(f"--- ⚠️ Case index save failed: {e} ---")
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def save(self) -> None:
+        """Flushes pending cases to disk, then merges segments. Queries keep running meanwhile."""
+        if not self.directory:
+            return
+        with self._save_lock:
+            self._flush()
+            self._merge()
+            self._remove_retired_segments()
+
+    def _flush(self) -> None:
+        with self._lock:
+            count = self._count
+            signatures = list(self._pending_signatures)
+            payloads = list(self._pending_payloads)
+        if not signatures:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+
+        last_end = int(self._ends[-1]) if count else 0
+        ends = last_end + np.cumsum([len(p) for p in payloads], dtype=np.int64)
+        with open(self._path("cases.jsonl"), "ab") as f:
+            f.writelines(payloads)
+        with open(self._path("offsets.i64"), "ab") as f:
+            f.write(ends.tobytes())
+        signatures = np.stack(signatures)
+        with open(self._path("signatures.u32"), "ab") as f:
+            f.write(signatures.tobytes())
+
+        new_count = count + len(signatures)
+        segment = self._write_segment(band_keys(signatures).ravel(),
+                                      np.repeat(np.arange(count, new_count, dtype=np.uint32), BANDS))
+        self._write_manifest(new_count, self._segments + [segment])
+        views = self._open_views(new_count)
+
+        with self._lock:
+            self._signatures, self._ends, self._payloads = views
+            self._segments = self._segments + [segment]
+            self._count = new_count
+            # Cases added while flushing stay pending.
+            flushed = len(signatures)
+            del self._pending_signatures[:flushed]
+            del self._pending_payloads[:flushed]
+            self._pending_buckets = defaultdict(list)
+            if self._pending_signatures:
+                for i, key_row in enumerate(band_keys(np.stack(self._pending_signatures))):
+                    for key in key_row:
+                        self._pending_buckets[int(key)].append(new_count + i)
+
+    def _merge(self) -> None:
+        """Merges the two newest segments while the older one is less than SEGMENT_SIZE_RATIO times larger."""
+        while (len(self._segments) >= 2
+               and self._segments[-2].cases < SEGMENT_SIZE_RATIO * self._segments[-1].cases):
+            older, newer = self._segments[-2:]
+            merged = self._write_segment(np.concatenate([older.keys, newer.keys]),
+                                         np.concatenate([older.ids, newer.ids]))
+            segments = self._segments[:-2] + [merged]
+            self._write_manifest(self._count, segments)
+            with self._lock:
+                self._segments = segments
+            del older, newer
+
+    def _remove_retired_segments(self) -> None:
+        """
+        Deletes segment files the manifest no longer lists (merged away, or written by a crashed flush).
+        A file that is still memory-mapped cannot be deleted on Windows; it is retried on the next save or load.
+        """
+        live = {segment.name for segment in self._segments}
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith("segment-") and file_name.split(".")[0] not in live:
+                try:
+                    os.remove(self._path(file_name))
+                except OSError:
+                    pass
+
+
+case_index = CaseIndex(directory=os.getenv("CASE_INDEX_DIR") or None,
+                       save_every=int(os.getenv("CASE_INDEX_SAVE_EVERY", "50")))
+if case_index.directory:
+    atexit.register(case_index.save)
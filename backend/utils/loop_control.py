@@ -0,0 +1,107 @@
+# utils/loop_control.py
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Specialist (120B) calls allowed per session, including the forced final analysis.
+SPECIALIST_CALL_BUDGET = int(os.getenv("SPECIALIST_CALL_BUDGET", "4"))
+# Minimum confidence increase (percentage points) for another question round to be worth it.
+MIN_CONFIDENCE_GAIN = float(os.getenv("MIN_CONFIDENCE_GAIN", "5"))
+# Minimum share of a round's questions that must not have been asked before.
+MIN_QUESTION_NOVELTY = float(os.getenv("MIN_QUESTION_NOVELTY", "0.5"))
+# Token overlap above which two questions count as the same question.
+DUPLICATE_QUESTION_SIMILARITY = 0.6
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "the", "you", "your", "do", "does", "did", "have", "has", "any", "is", "are",
+              "of", "to", "in", "on", "or", "and", "what", "how", "when", "for", "with", "been", "if"}
+
+
+def specialist_rounds(analysis_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The history entries written by specialist calls (skips the triage placeholder)."""
+    return [entry for entry in analysis_history if entry.get("status") != "pending"]
+
+
+def extract_confidence(entry: Dict[str, Any]) -> Optional[float]:
+    value = entry.get("confidence_score")
+    if value is None:
+        # Model output: "analysis" or "probable_diagnosis" may be null, a string or a list.
+        analysis = entry.get("analysis")
+        diagnosis = analysis.get("probable_diagnosis") if isinstance(analysis, dict) else None
+        value = diagnosis.get("confidence_score") if isinstance(diagnosis, dict) else None
+    match = re.search(r"\d+(?:\.\d+)?", str(value)) if value is not None else None
+    return float(match.group()) if match else None
+
+
+def _tokens(text: str) -> set:
+    return {word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS}
+
+
+def question_novelty(new_questions: Iterable[str], asked_questions: Iterable[str]) -> float:
+    """Share of `new_questions` that are not near-duplicates (token Jaccard) of any asked question."""
+    new_questions = list(new_questions)
+    if not new_questions:
+        return 0.0
+    asked = [tokens for tokens in (_tokens(q) for q in asked_questions) if tokens]
+
+    novel = 0
+    for question in new_questions:
+        tokens = _tokens(question)
+        if not any(len(tokens & other) / len(tokens | other) >= DUPLICATE_QUESTION_SIMILARITY for other in asked):
+            novel += 1
+    return novel / len(new_questions)
+
+
+def decide_next_round(analysis_history: List[Dict[str, Any]], asked_questions: Iterable[str]) -> Tuple[bool, str]:
+    """
+    Decides whether an incomplete specialist analysis earns another question round.
+
+    Returns (continue, reason). Stops when the call budget would be exhausted (one call
+    is kept for the forced final analysis), when the specialist only repeats questions,
+    or when confidence stopped improving between rounds.
+    """
+    rounds = specialist_rounds(analysis_history)
+    if len(rounds) >= SPECIALIST_CALL_BUDGET - 1:
+        return False, "budget_exhausted"
+
+    latest = rounds[-1] if rounds else {}
+    if question_novelty(latest.get("missing_information", []), asked_questions) < MIN_QUESTION_NOVELTY:
+        return False, "no_new_questions"
+
+    confidences = [c for c in (extract_confidence(entry) for entry in rounds) if c is not None]
+    if len(confidences) >= 2 and confidences[-1] - confidences[-2] < MIN_CONFIDENCE_GAIN:
+        return False, "confidence_plateau"
+
+    return True, "continue"
+
+
+class LoopMetrics:
+    """Process-wide counters for the specialist question loop."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rounds_per_session: Counter = Counter()
+        self.stop_reasons: Counter = Counter()
+
+    def record(self, rounds: int, reason: str) -> None:
+        with self._lock:
+            self.rounds_per_session[rounds] += 1
+            self.stop_reasons[reason] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = sum(self.rounds_per_session.values())
+            total_rounds = sum(rounds * count for rounds, count in self.rounds_per_session.items())
+            return {
+                "sessions": sessions,
+                "mean_rounds": total_rounds / sessions if sessions else 0.0,
+                "max_rounds": max(self.rounds_per_session, default=0),
+                "rounds_per_session": dict(sorted(self.rounds_per_session.items())),
+                "stop_reasons": dict(self.stop_reasons),
+            }
+
+
+loop_metrics = LoopMetrics()
@@ -0,0 +1,130 @@
+# utils/node_cache.py
+
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .serialization import dumps_bytes
+
+_MISSING = object()
+
+
+def _read_path(state: Dict[str, Any], path: str) -> Any:
+    """Reads a dotted path (e.g. "structured_input.lab_results") from the state."""
+    value: Any = state
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def fingerprint_state(state: Dict[str, Any], reads: Iterable[str]) -> str:
+    """Hashes exactly the state keys a node reads. Absent keys hash differently from None."""
+    parts = []
+    for path in reads:
+        value = _read_path(state, path)
+        parts.append([path, value is not _MISSING, None if value is _MISSING else value])
+    return hashlib.sha256(dumps_bytes(parts, sort_keys=True)).hexdigest()
+
+
+def component_version(prompt=None, model=None, version: str = "") -> str:
+    """
+    Derives a short version tag from the prompt templates and model settings,
+    so editing a prompt or switching a model invalidates old cache entries.
+    """
+    parts = [version]
+    if prompt is not None:
+        for message in getattr(prompt, "messages", []):
+            template = getattr(getattr(message, "prompt", None), "template", None)
+            parts.append(template if template is not None else repr(message))
+    if model is not None:
+        parts.append(str(getattr(model, "model_name", None) or getattr(model, "model", None) or repr(model)))
+        parts.append(str(getattr(model, "temperature", "")))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class NodeCache:
+    """A bounded, thread-safe LRU cache shared by all sessions."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+node_cache = NodeCache(max_entries=int(os.getenv("NODE_CACHE_SIZE", "1024")))
+NODE_CACHE_ENABLED = os.getenv("NODE_CACHE_ENABLED", "1") != "0"
+
+
+def memoize_node(
+    reads: Iterable[str],
+    prompt=None,
+    model=None,
+    version: str = "",
+    cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    cache: Optional[NodeCache] = None,
+):
+    """
+    Memoizes a pure graph node on the state keys it reads.
+
+    On a hit the node is skipped and a copy of the stored state delta is returned.
+    `cacheable` can reject deltas that should not be reused (e.g. parsing failures).
+    """
+    reads = tuple(reads)
+
+    def decorator(node_fn):
+        node_version = component_version(prompt, model, version)
+
+        @wraps(node_fn)
+        def wrapper(state):
+            store = cache if cache is not None else node_cache
+            if not NODE_CACHE_ENABLED:
+                return node_fn(state)
+
+            key = f"{node_fn.__name__}:{node_version}:{fingerprint_state(state, reads)}"
+            cached = store.get(key)
+            if cached is not _MISSING:
+                print(f"--- ♻️ CACHE HIT: {node_fn.__name__} ---")
+                return copy.deepcopy(cached)
+
+            delta = node_fn(state)
+            if cacheable is None or cacheable(delta):
+                store.put(key, copy.deepcopy(delta))
+            return delta
+
+        return wrapper
+
+    return decorator
@@ -1,12 +1,16 @@
 # utils/pdf_generator.py
 
+import io
+from typing import Optional
+
 import markdown
 from xhtml2pdf import pisa
 
-def create_pdf_report(markdown_text: str, filename: str = "summary.pdf"):
-    """
-    Creates a PDF file from a Markdown formatted string by converting it to HTML first.
-    """
+from .artifact_store import report_store
+
+
+def render_report_html(markdown_text: str) -> str:
+    """Converts the Markdown report into the styled HTML that is rendered to PDF."""
     # Convert Markdown to HTML
     html_text = markdown.markdown(markdown_text)
 
@@ -66,18 +70,28 @@ def create_pdf_report(markdown_text: str, filename: str = "summary.pdf"):
     </body>
     </html>
     """
+    return styled_html
 
-    # Open the output file in binary write mode
-    with open(filename, "wb") as pdf_file:
-        # Create the PDF
-        pisa_status = pisa.CreatePDF(
-            styled_html,                # The HTML content
-            dest=pdf_file)              # File handle to receive result
 
-    # Check if PDF creation was successful
-    if not pisa_status.err:
-        print(f"--- 📄 Report successfully generated and saved as {filename} ---")
-        return filename
-    else:
+def store_pdf_report(markdown_text: str) -> Optional[str]:
+    """
+    Renders the report into the content-addressed report store and returns its key.
+
+    The key is the hash of the rendered HTML (PDF bytes embed timestamps), so an
+    identical report is served from the store without being regenerated.
+    """
+    styled_html = render_report_html(markdown_text)
+    report_id = report_store.key_for(styled_html)
+    if report_store.get(report_id):
+        print(f"--- 📄 Report {report_id[:12]} already stored, skipping PDF generation ---")
+        return report_id
+
+    buffer = io.BytesIO()
+    pisa_status = pisa.CreatePDF(styled_html, dest=buffer)
+    if pisa_status.err:
         print(f"--- ❌ Error creating PDF: {pisa_status.err} ---")
-        return None
\ No newline at end of file
+        return None
+
+    path = report_store.put(report_id, buffer.getvalue())
+    print(f"--- 📄 Report successfully generated and stored as {path} ---")
+    return report_id
\ No newline at end of file
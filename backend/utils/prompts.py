@@ -7,23 +7,16 @@ intake_prompt = ChatPromptTemplate.from_messages([
      """You are a Clinical Intake Specialist AI. Your role is to meticulously structure patient information.
 
      **Instructions:**
-     1.  Analyze the provided patient data and vitals.
+     1.  Analyze the provided patient data. Vital signs have already been parsed and flagged; do not re-interpret them.
      2.  Normalize the symptoms into a list of standardized medical terms.
-     3.  Interpret the vital signs based on standard thresholds
-     4.  Assess the patient's description to infer a severity level from: "Mild", "Moderate", or "Severe".
-     5.  Identify critical missing information a doctor would need (e.g., allergies, current medications, symptom duration, relevant medical history).
-     6.  Your response MUST be ONLY a single, clean JSON object. Do not add any commentary or explanations.
+     3.  Assess the patient's description to infer a severity level from: "Mild", "Moderate", or "Severe".
+     4.  Identify critical missing information a doctor would need (e.g., allergies, current medications, relevant medical history). Do not repeat the questions already listed.
+     5.  Your response MUST be ONLY a single, clean JSON object. Do not add any commentary or explanations.
 
      **JSON Schema:**
      {{
          "symptoms": ["list", "of", "normalized", "symptoms"],
          "severity": "Mild",
-         "vital_flags": {{
-             "fever": false,
-             "hypertension": false,
-             "tachycardia": true,
-             "hypoxia": false
-         }},
          "missing_information": ["List of questions for the patient."]
      }}
      """),
@@ -31,11 +24,8 @@ intake_prompt = ChatPromptTemplate.from_messages([
      """**Patient Information:**
      {patient_data}
 
-     **Vitals:**
-     -   Temperature: {temperature}
-     -   Blood Pressure: {bp}
-     -   Pulse: {pulse}
-     -   SpO2: {spo2}
+     **Vital Flags:** {vital_flags}
+     **Already Asked:** {known_missing}
      """)
 ])
 
@@ -127,6 +117,7 @@ general_medicine_prompt = ChatPromptTemplate.from_messages([
 
      **Step 1: Assess Information Sufficiency**
      - Review all structured data, lab results, and the full conversation history.
+     - If the structured data contains "similar_prior_case", it is the final analysis of a near-identical earlier case. Treat it as a draft: reuse what is consistent with this patient's data and revise anything that differs.
      - If sufficient, proceed to Step 2A.
      - If critical information is still missing, proceed to Step 2B.
 
@@ -156,6 +147,7 @@ general_medicine_prompt = ChatPromptTemplate.from_messages([
      {{
        "status": "incomplete",
        "reasoning": "Briefly explain what critical information is missing and why it's needed.",
+       "confidence_score": "Your current confidence (0-100) in the leading hypothesis.",
        "missing_information": ["List of new, specific questions for the patient."]
      }}
 
@@ -255,4 +247,17 @@ dermatology_messages = [
 ]
 dermatology_prompt = ChatPromptTemplate.from_messages(dermatology_messages)
 
-# --- MODIFIED SECTION END ---
\ No newline at end of file
+# --- MODIFIED SECTION END ---
+
+# <-- NEW: Short narrative for the templated report. The structured sections are rendered locally. -->
+report_narrative_prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     """You are a Medical Scribe AI writing for a clinician.
+
+     **Instructions:**
+     1.  Write a concise narrative summary (3-5 sentences) of the case: who the patient is, the presenting complaint, the leading diagnosis and the most important next step.
+     2.  Do not use headings or bullet points, and do not repeat every data point; the structured sections of the report are generated separately.
+     3.  The final output MUST be only the plain narrative text.
+     """),
+    ("human", "Please write the narrative summary for the following case data:\n\n{final_json_data}")
+])
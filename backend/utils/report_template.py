@@ -0,0 +1,166 @@
+# utils/report_template.py
+
+from typing import Any, Dict, List, Optional
+
+from .serialization import loads
+
+VITAL_FLAG_LABELS = {
+    "fever": "Fever",
+    "hypertension": "Hypertension",
+    "tachycardia": "Tachycardia",
+    "hypoxia": "Hypoxia (low SpO2)",
+}
+
+DEFAULT_DISCLAIMER = "A qualified human doctor must make the final prescribing decision."
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Model output is not schema-checked: a field may be null, a bare string or a list."""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _bullets(items: List[str], empty: str, indent: str = "") -> List[str]:
+    items = [str(item) for item in items if item not in (None, "")]
+    if not items:
+        return [f"{indent}- {empty}"]
+    return [f"{indent}- {item}" for item in items]
+
+
+def _format_confidence(value: Any) -> str:
+    if value in (None, ""):
+        return "Not provided"
+    text = str(value).strip()
+    return text if text.endswith("%") else f"{text}%"
+
+
+def _red_flags(vital_flags: Dict[str, Any], urgency: str) -> List[str]:
+    flags = [label for key, label in VITAL_FLAG_LABELS.items() if vital_flags.get(key)]
+    if urgency.lower() in ("high", "critical"):
+        flags.append(f"Specialist rated urgency as **{urgency}**.")
+    return flags
+
+
+def parse_lab_summary(summary: str) -> Any:
+    """Lab summaries are stored as the raw model output, which is usually (fenced) JSON."""
+    cleaned = summary.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    try:
+        return loads(cleaned.strip())
+    except ValueError:
+        return summary
+
+
+def _lab_findings(lab_results: Optional[Dict[str, Any]]) -> List[str]:
+    findings = []
+    for report_name, result in (lab_results or {}).items():
+        if not isinstance(result, dict):
+            continue
+        if "error" in result:
+            findings.append(f"{report_name}: {result['error']}")
+            continue
+        summary = result.get("summary")
+        if isinstance(summary, str):
+            summary = parse_lab_summary(summary)
+        if isinstance(summary, dict):
+            for finding in _as_list(summary.get("abnormal_findings")):
+                if not isinstance(finding, dict):
+                    findings.append(str(finding))
+                    continue
+                findings.append(
+                    f"{finding.get('parameter', 'Unknown')}: {finding.get('value', '?')} "
+                    f"({finding.get('interpretation', 'abnormal')}; normal {finding.get('standard_range', 'n/a')})"
+                )
+            for concern in _as_list(summary.get("concerns")):
+                findings.append(f"Concern: {concern}")
+        elif summary:
+            findings.append(f"{report_name}: {summary}")
+    return findings
+
+
+def render_report_markdown(
+    raw_input: Optional[Dict[str, Any]],
+    final_analysis: Optional[Dict[str, Any]],
+    lab_results: Optional[Dict[str, Any]] = None,
+    vital_flags: Optional[Dict[str, Any]] = None,
+    narrative: Optional[str] = None,
+) -> str:
+    """
+    Deterministically renders the clinician report in the same Markdown layout
+    as `medical_report_prompt`, straight from the structured analysis.
+    """
+    raw_input = raw_input or {}
+    final_analysis = _as_dict(final_analysis)
+    analysis = _as_dict(final_analysis.get("analysis"))
+    diagnosis = _as_dict(analysis.get("probable_diagnosis"))
+    urgency = str(diagnosis.get("urgency") or final_analysis.get("urgency") or "Not assessed")
+
+    lines = ["# Diagnostic Summary Report", ""]
+
+    if narrative:
+        lines += ["## Summary", narrative.strip(), ""]
+
+    lines += [
+        "## Patient Overview",
+        f"- **Patient Name:** {raw_input.get('Name', 'Not provided')}",
+        f"- **Age:** {raw_input.get('age', 'Not provided')}",
+        f"- **Primary Complaint:** {raw_input.get('symptoms', 'Not provided')}",
+        "",
+        "## Red-Flag Alert",
+        *_bullets(_red_flags(vital_flags or {}, urgency), "No critical red flags detected."),
+        "",
+        "## Risk Stratification",
+        f"- **Level:** {urgency}",
+        "",
+        "## Probable Diagnosis",
+    ]
+
+    if "error" in final_analysis:
+        lines += [f"- Analysis could not be completed: {final_analysis['error']}", ""]
+    elif final_analysis.get("status") == "incomplete" or not diagnosis:
+        lines += [
+            "- Analysis is incomplete.",
+            f"- **Reasoning:** {final_analysis.get('reasoning', 'Not provided')}",
+            "",
+        ]
+    else:
+        lines += [
+            f"- **Condition:** {diagnosis.get('condition', 'Not provided')}",
+            f"- **Confidence:** {_format_confidence(diagnosis.get('confidence_score'))}",
+            f"- **Reasoning:** {diagnosis.get('reasoning', 'Not provided')}",
+            "- **Justification (Explainability Pack):**",
+            *_bullets(_as_list(diagnosis.get("evidence")), "No supporting evidence recorded.", indent="    "),
+            "",
+        ]
+
+    differentials = [
+        f"**{item.get('condition', 'Unknown')}**: {item.get('reasoning', '')}".rstrip(": ")
+        if isinstance(item, dict) else item
+        for item in _as_list(analysis.get("differential_diagnosis"))
+    ]
+    lines += [
+        "## Differential Diagnoses",
+        *_bullets(differentials, "None recorded."),
+        "",
+        "## Key Laboratory Findings",
+        *_bullets(_lab_findings(lab_results), "No lab reports were provided."),
+        "",
+        "## Recommended Plan",
+        "### Suggested Diagnostic Tests",
+        *_bullets(_as_list(analysis.get("recommended_tests")), "None recorded."),
+        "### Suggested Medications / Treatments",
+        *_bullets(_as_list(analysis.get("suggested_medications")), "None recorded."),
+        f"- *{analysis.get('medication_disclaimer') or DEFAULT_DISCLAIMER}*",
+        "",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,77 @@
+# utils/serialization.py
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with langgraph, the stdlib is only a fallback
+    orjson = None
+
+_FRAGMENT_CACHE_SIZE = 256
+_fragments: "OrderedDict[int, tuple]" = OrderedDict()
+_fragments_lock = threading.Lock()
+
+
+def _options(indent: bool, sort_keys: bool) -> int:
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return option
+
+
+def dumps_bytes(obj: Any, *, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Serializes to UTF-8 JSON bytes. Unknown types are stringified."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=_options(indent, sort_keys))
+    return dumps(obj, indent=indent, sort_keys=sort_keys).encode("utf-8")
+
+
+def dumps(obj: Any, *, indent: bool = False, sort_keys: bool = False) -> str:
+    if orjson is not None:
+        return dumps_bytes(obj, indent=indent, sort_keys=sort_keys).decode("utf-8")
+    return json.dumps(
+        obj,
+        default=str,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    )
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def fragment(obj: Any) -> Any:
+    """
+    Returns `obj` pre-serialized, for embedding in a larger document passed to dumps().
+
+    Results are cached by object identity, so a sub-object that is shared unchanged
+    across nodes (raw_input, lab_results) is only encoded once. Only use this for
+    objects that are never mutated in place. Without orjson, `obj` is returned as is.
+    """
+    if orjson is None or not hasattr(orjson, "Fragment"):
+        return obj
+    key = id(obj)
+    with _fragments_lock:
+        cached = _fragments.get(key)
+        if cached is not None and cached[0] is obj:
+            _fragments.move_to_end(key)
+            return cached[1]
+
+    encoded = orjson.Fragment(dumps_bytes(obj))
+    with _fragments_lock:
+        # Holding a reference to `obj` keeps its id from being reused while cached.
+        _fragments[key] = (obj, encoded)
+        _fragments.move_to_end(key)
+        while len(_fragments) > _FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return encoded
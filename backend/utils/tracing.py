@@ -0,0 +1,166 @@
+# utils/tracing.py
+
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterator, List, Optional
+
+import ormsgpack
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig, ensure_config
+
+LLM_TRACE_MODE = os.getenv("LLM_TRACE_MODE", "off")            # off | record | replay
+LLM_TRACE_FILE = os.getenv("LLM_TRACE_FILE", "llm_trace.msgpack")
+LLM_TRACE_LATENCY = os.getenv("LLM_TRACE_LATENCY", "zero")     # zero | real
+
+_LENGTH = struct.Struct(">I")
+
+
+def write_record(stream, record: Dict[str, Any]) -> None:
+    """Appends one length-prefixed msgpack record."""
+    payload = ormsgpack.packb(record)
+    stream.write(_LENGTH.pack(len(payload)))
+    stream.write(payload)
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "rb") as stream:
+        while True:
+            header = stream.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(header)
+            payload = stream.read(length)
+            if len(payload) < length:
+                return  # Truncated tail from an interrupted recording.
+            yield ormsgpack.unpackb(payload)
+
+
+def _prompt_messages(prompt_value: Any) -> List[Dict[str, str]]:
+    if hasattr(prompt_value, "to_messages"):
+        return [{"role": m.type, "content": str(m.content)} for m in prompt_value.to_messages()]
+    return [{"role": "human", "content": str(prompt_value)}]
+
+
+def _prompt_hash(messages: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(message["role"].encode("utf-8") + b"\x1f" + message["content"].encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+
+class TraceRecorder:
+    """Appends every LLM interaction to a trace file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, record: Dict[str, Any]) -> None:
+        with self._lock, open(self.path, "ab") as stream:
+            write_record(stream, record)
+
+
+class TraceReplayer:
+    """
+    Serves recorded responses instead of calling the model.
+
+    A call is matched on its exact prompt first. If the prompt changed (e.g. when
+    comparing two versions of the code), the next unused response recorded for the
+    same client and graph node is used instead.
+    """
+
+    def __init__(self, path: str, latency: str = "zero"):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._used = set()
+        self._records = list(read_records(path))
+        self._by_prompt = defaultdict(deque)
+        self._by_node = defaultdict(deque)
+        for index, record in enumerate(self._records):
+            self._by_prompt[(record["client"], record["prompt_hash"])].append(index)
+            self._by_node[(record["client"], record["node"])].append(index)
+
+    def _take(self, queue: deque) -> Optional[int]:
+        while queue:
+            index = queue.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                return index
+        return None
+
+    def replay(self, client: str, node: str, prompt_hash: str) -> Dict[str, Any]:
+        with self._lock:
+            index = self._take(self._by_prompt[(client, prompt_hash)])
+            if index is None:
+                index = self._take(self._by_node[(client, node)])
+        if index is None:
+            raise LookupError(f"No recorded response left for client={client!r} node={node!r}")
+
+        record = self._records[index]
+        if self.latency == "real":
+            time.sleep(record["elapsed"])
+        return record
+
+
+class TracedChatModel(Runnable):
+    """Wraps a chat model so its calls are recorded to, or replayed from, a trace file."""
+
+    def __init__(self, name: str, model: Any, recorder: Optional[TraceRecorder] = None,
+                 replayer: Optional[TraceReplayer] = None):
+        self.name = name
+        self.model = model
+        self.recorder = recorder
+        self.replayer = replayer
+
+    def __getattr__(self, item):
+        # Expose model_name, temperature, ... of the wrapped client.
+        if item == "model":
+            raise AttributeError(item)
+        return getattr(self.model, item)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        config = ensure_config(config)
+        node = config.get("metadata", {}).get("langgraph_node", "")
+        messages = _prompt_messages(input)
+        prompt_hash = _prompt_hash(messages)
+
+        if self.replayer is not None:
+            record = self.replayer.replay(self.name, node, prompt_hash)
+            return AIMessage(content=record["response"])
+
+        start = time.perf_counter()
+        response = self.model.invoke(input, config, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if self.recorder is not None:
+            self.recorder.record({
+                "client": self.name,
+                "model": str(getattr(self.model, "model_name", "")),
+                "node": node,
+                "prompt_hash": prompt_hash,
+                "prompt": messages,
+                "response": str(response.content),
+                "elapsed": elapsed,
+                "ts": time.time(),
+            })
+        return response
+
+
+_recorder: Optional[TraceRecorder] = None
+_replayer: Optional[TraceReplayer] = None
+
+
+def traced(name: str, model: Any) -> Any:
+    """Wraps `model` according to LLM_TRACE_MODE; returns it unchanged when tracing is off."""
+    global _recorder, _replayer
+    if LLM_TRACE_MODE == "record":
+        _recorder = _recorder or TraceRecorder(LLM_TRACE_FILE)
+        return TracedChatModel(name, model, recorder=_recorder)
+    if LLM_TRACE_MODE == "replay":
+        _replayer = _replayer or TraceReplayer(LLM_TRACE_FILE, LLM_TRACE_LATENCY)
+        return TracedChatModel(name, model, replayer=_replayer)
+    return model
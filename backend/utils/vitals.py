@@ -0,0 +1,150 @@
+# utils/vitals.py
+
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Adult resting thresholds used for the intake red flags.
+FEVER_C = 38.0
+HYPERTENSION_SYSTOLIC = 140.0
+HYPERTENSION_DIASTOLIC = 90.0
+TACHYCARDIA_BPM = 100.0
+HYPOXIA_SPO2 = 94.0
+
+VITAL_FIELDS = ("temperature", "bp", "pulse", "spo2")
+
+# Questions asked when a standard intake field is missing or unreadable.
+MISSING_FIELD_QUESTIONS = {
+    "age": "What is your age?",
+    "gender": "What is your gender?",
+    "symptoms": "Can you describe the symptoms you are experiencing?",
+    "duration": "How long have you had these symptoms?",
+    "temperature": "What is your current body temperature?",
+    "bp": "What is your current blood pressure (e.g., 120/80)?",
+    "pulse": "What is your current pulse rate (beats per minute)?",
+    "spo2": "What is your current oxygen saturation (SpO2) reading?",
+}
+
+# Numbers glued to a letter are part of a label ("SpO2 92", "O2 sat 95"), not the reading.
+_NUMBER = re.compile(r"(?<![A-Za-z\d.])-?\d+(?:\.\d+)?")
+_BP = re.compile(r"(?<![A-Za-z\d.])(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)")
+
+
+def _first_number(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _NUMBER.search(str(value or ""))
+    return float(match.group()) if match else math.nan
+
+
+def parse_temperature(value: Any) -> float:
+    """Returns the temperature in °C. Accepts "101.5 F", "38.2°C", "38,2 c" or bare numbers."""
+    text = str(value or "").strip().lower().replace(",", ".")
+    number = _first_number(text)
+    if math.isnan(number):
+        return math.nan
+    if re.search(r"(?<![a-z])°?\s*f\b|fahrenheit", text):
+        return (number - 32.0) * 5.0 / 9.0
+    if re.search(r"(?<![a-z])°?\s*c\b|celsius", text):
+        return number
+    # No unit given: anything above a plausible body temperature in °C must be °F.
+    return (number - 32.0) * 5.0 / 9.0 if number > 45.0 else number
+
+
+def parse_bp(value: Any) -> tuple:
+    """Splits "110/70 mmHg" into (systolic, diastolic)."""
+    match = _BP.search(str(value or ""))
+    if not match:
+        return math.nan, math.nan
+    return float(match.group(1)), float(match.group(2))
+
+
+def parse_spo2(value: Any) -> float:
+    """Returns SpO2 as a percentage. Fractions such as "0.97" are scaled up."""
+    number = _first_number(value)
+    if not math.isnan(number) and 0 < number <= 1:
+        number *= 100.0
+    return number
+
+
+def normalize_vitals(vitals: Optional[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """Parses the raw vitals strings into numbers. Unreadable values become None."""
+    vitals = vitals or {}
+    systolic, diastolic = parse_bp(vitals.get("bp"))
+    values = {
+        "temperature_c": parse_temperature(vitals.get("temperature")),
+        "systolic": systolic,
+        "diastolic": diastolic,
+        "pulse": _first_number(vitals.get("pulse")),
+        "spo2": parse_spo2(vitals.get("spo2")),
+    }
+    return {key: (None if math.isnan(v) else round(v, 1)) for key, v in values.items()}
+
+
+def _flags_from_normalized(parsed: List[Dict[str, Optional[float]]]) -> List[Dict[str, bool]]:
+    columns = {
+        key: np.array([np.nan if p[key] is None else p[key] for p in parsed], dtype=np.float64)
+        for key in ("temperature_c", "systolic", "diastolic", "pulse", "spo2")
+    }
+    # NaN compares False, so missing values never raise a flag.
+    with np.errstate(invalid="ignore"):
+        fever = columns["temperature_c"] >= FEVER_C
+        hypertension = (columns["systolic"] >= HYPERTENSION_SYSTOLIC) | (columns["diastolic"] >= HYPERTENSION_DIASTOLIC)
+        tachycardia = columns["pulse"] > TACHYCARDIA_BPM
+        hypoxia = columns["spo2"] < HYPOXIA_SPO2
+
+    return [
+        {
+            "fever": bool(f),
+            "hypertension": bool(h),
+            "tachycardia": bool(t),
+            "hypoxia": bool(x),
+        }
+        for f, h, t, x in zip(fever, hypertension, tachycardia, hypoxia)
+    ]
+
+
+def compute_vital_flags_batch(vitals_list: List[Optional[Dict[str, Any]]]) -> List[Dict[str, bool]]:
+    """Applies the threshold rules to a batch of raw vitals at once."""
+    return _flags_from_normalized([normalize_vitals(v) for v in vitals_list])
+
+
+def _missing_fields(raw: Dict[str, Any], normalized: Dict[str, Optional[float]]) -> List[str]:
+    missing = [
+        field for field in ("age", "gender", "symptoms", "duration")
+        if raw.get(field) is None or (isinstance(raw.get(field), str) and not raw[field].strip())
+    ]
+    readable = {
+        "temperature": normalized["temperature_c"] is not None,
+        "bp": normalized["systolic"] is not None,
+        "pulse": normalized["pulse"] is not None,
+        "spo2": normalized["spo2"] is not None,
+    }
+    return missing + [field for field in VITAL_FIELDS if not readable[field]]
+
+
+def precompute_intake_batch(raw_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Derives everything the intake step can compute without the model:
+    normalized vitals, vital flags and questions for missing standard fields.
+    """
+    raw_records = [raw or {} for raw in raw_records]
+    normalized = [normalize_vitals(raw.get("vitals")) for raw in raw_records]
+    flags = _flags_from_normalized(normalized)
+
+    results = []
+    for raw, vitals, vital_flags in zip(raw_records, normalized, flags):
+        missing_fields = _missing_fields(raw, vitals)
+        results.append({
+            "normalized_vitals": vitals,
+            "vital_flags": vital_flags,
+            "missing_fields": missing_fields,
+            "missing_questions": [MISSING_FIELD_QUESTIONS[field] for field in missing_fields],
+        })
+    return results
+
+
+def precompute_intake(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return precompute_intake_batch([raw])[0]